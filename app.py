@@ -4,8 +4,10 @@ Auto-Post v2 — pywebview + Flask エントリポイント
 ローカルで Flask サーバーを起動し、pywebview でネイティブウィンドウに表示する。
 """
 
+import socket
 import sys
 import threading
+import time
 from pathlib import Path
 
 # Windows コンソールの文字化け対策（cp932 → utf-8）
@@ -24,11 +26,50 @@ else:
 # backend をインポートパスに追加
 sys.path.insert(0, str(_BASE))
 
+_HOST = "127.0.0.1"
+_PORT = 5199
+_URL = f"http://{_HOST}:{_PORT}"
+
+# サーバー起動待ちの間にウィンドウへ表示するプレースホルダ
+_LOADING_HTML = (
+    "<html><body style='background:#0f172a;color:#94a3b8;"
+    "font-family:sans-serif;display:flex;align-items:center;"
+    "justify-content:center;height:100vh;margin:0'>"
+    "⚡ AutoPost v2 を起動中...</body></html>"
+)
+
 
 def _start_flask():
-    """Flask サーバーをバックグラウンドで起動する。"""
+    """Flask サーバーをバックグラウンドで起動する。
+
+    waitress（マルチスレッド WSGI サーバー）を優先し、未インストール時のみ
+    Werkzeug の開発サーバーにフォールバックする。
+    """
     from backend.api import app
-    app.run(host="127.0.0.1", port=5199, debug=False, use_reloader=False)
+    try:
+        from waitress import serve
+    except ImportError:
+        app.run(host=_HOST, port=_PORT, debug=False, use_reloader=False, threaded=True)
+        return
+    serve(app, host=_HOST, port=_PORT, threads=8, connection_limit=200, channel_timeout=30)
+
+
+def _wait_for_server(timeout: float = 30.0) -> bool:
+    """Flask がポートで待ち受けを開始するまで待つ。"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((_HOST, _PORT), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def _load_when_ready(window):
+    """サーバーの起動を待ってからウィンドウに URL を読み込む。"""
+    _wait_for_server()
+    window.load_url(_URL)
 
 
 def main():
@@ -48,9 +89,11 @@ def main():
         icon = str(icon_path) if icon_path.exists() else None
 
         # pywebview ウィンドウ作成
+        # WebView の初期化と Flask の起動（backend の import）を並行させるため、
+        # まずプレースホルダを表示し、サーバー準備完了後に URL を読み込む
         window = webview.create_window(
             title="⚡ AutoPost v2",
-            url="http://127.0.0.1:5199",
+            html=_LOADING_HTML,
             width=1100,
             height=750,
             min_size=(900, 600),
@@ -61,13 +104,16 @@ def main():
             import ctypes
             ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("kuroka.autopost.2.0")
 
-        webview.start(debug=False)
+        webview.start(_load_when_ready, (window,), debug=False)
     else:
         # pywebview なし → ブラウザで開くフォールバック
         import webbrowser
         print("⚡ AutoPost v2 — ブラウザモードで起動します")
-        print("  → http://127.0.0.1:5199")
-        webbrowser.open("http://127.0.0.1:5199")
+        print(f"  → {_URL}")
+        threading.Thread(
+            target=lambda: _wait_for_server() and webbrowser.open(_URL),
+            daemon=True,
+        ).start()
         _start_flask()  # メインスレッドで Flask 起動（ブロッキング）
 
 
@@ -24,12 +24,14 @@ a = Analysis(
         'backend.engagement',
         'backend.config_manager',
         'flask',
+        'waitress',
+        'orjson',
         'google.genai',
         'tweepy',
         'feedparser',
-        'schedule',
+        'apscheduler.schedulers.background',
+        'apscheduler.triggers.cron',
         'requests',
-        'bs4',
     ],
     hookspath=[],
     hooksconfig={},
@@ -4,34 +4,95 @@ api.py — Flask REST API エンドポイント
 フロントエンド (HTML/JS) とバックエンド (logic.py 等) をつなぐ。
 """
 
+import concurrent.futures
+import hashlib
+import heapq
+import importlib
+import os
+import queue
+import random
+import re
+import shutil
 import sys
+import tempfile
 import threading
 import time
 import traceback
+import uuid
+from collections import deque
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 
-from flask import Flask, jsonify, request
+import orjson
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from flask import Flask, Response, jsonify, request, send_from_directory
+from flask.json.provider import JSONProvider
 
-from backend.config_manager import load_config, save_config, get_default_config
-from backend import logic
+from backend.config_manager import (
+    load_config, peek_config, save_config, patch_config, get_default_config,
+)
 from backend import engagement
-import random
+
+
+class _LazyModule:
+    """初回の属性アクセスで実際に import するモジュールのプロキシ。
+
+    logic は tweepy / google-genai / feedparser を読み込むため重い。
+    サーバーの起動を待たせないよう、最初に使われるまで import を遅らせる。
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        module = self._module
+        if module is None:
+            # import_module はインポートロックで保護されるため並行呼び出しでも安全
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+
+logic = _LazyModule("backend.logic")
 
 # プロジェクトルート = backend/ の親
 _PROJECT_ROOT = Path(__file__).resolve().parent.parent
 _FRONTEND_DIR = _PROJECT_ROOT / "frontend"
+_CACHE_DIR = _PROJECT_ROOT / ".cache"
+
+
+class OrjsonProvider(JSONProvider):
+    """jsonify / request.get_json を orjson で処理する JSON プロバイダ。"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        # dumps() は str を返す契約なので、jsonify では bytes をそのまま本文にして
+        # decode → encode の往復を省く
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), mimetype="application/json",
+        )
+
 
 app = Flask(
     __name__,
     static_folder=str(_FRONTEND_DIR),
     static_url_path="",
 )
+app.json = OrjsonProvider(app)
 
 # ---------------------------------------------------------------------------
 # ブラウザ自動終了用ハートビート
 # ---------------------------------------------------------------------------
-_last_heartbeat: float = 0.0
+_heartbeat_event = threading.Event()  # ping ごとにセットされる
 _heartbeat_started = False
 _HEARTBEAT_TIMEOUT = 120  # 秒（ブラウザ最小化時のスロットリング対策で長めに設定）
 
@@ -39,8 +100,8 @@ _HEARTBEAT_TIMEOUT = 120  # 秒（ブラウザ最小化時のスロットリン
 @app.route("/api/heartbeat", methods=["POST"])
 def heartbeat():
     """フロントエンドからの生存確認。"""
-    global _last_heartbeat, _heartbeat_started
-    _last_heartbeat = time.time()
+    global _heartbeat_started
+    _heartbeat_event.set()
     if not _heartbeat_started:
         _heartbeat_started = True
         t = threading.Thread(target=_heartbeat_watchdog, daemon=True)
@@ -51,50 +112,70 @@ def heartbeat():
 def _heartbeat_watchdog():
     """ハートビートが途絶えたらプロセスを終了する。
     ただしスケジューラ実行中は終了しない。"""
-    import os
     while True:
-        time.sleep(10)
-        if _last_heartbeat > 0 and (time.time() - _last_heartbeat) > _HEARTBEAT_TIMEOUT:
-            # スケジューラが動いている間は終了しない
-            if _scheduler_running:
-                continue
-            print("🛑 ブラウザが閉じられました。サーバーを終了します。")
-            os._exit(0)
+        # 定期的に起きて時刻を比べる代わりに、次の ping をタイムアウト付きで待つ
+        if _heartbeat_event.wait(timeout=_HEARTBEAT_TIMEOUT):
+            _heartbeat_event.clear()
+            continue
+        # スケジューラが動いている間は終了しない
+        if _scheduler_running():
+            continue
+        print("🛑 ブラウザが閉じられました。サーバーを終了します。")
+        _flush_logs()
+        os._exit(0)
 
 
 @app.route("/api/heartbeat/close", methods=["POST"])
 def heartbeat_close():
     """ブラウザが閉じられたときの即座通知 (sendBeacon)。"""
-    import os
-    if _scheduler_running:
+    if _scheduler_running():
         print("⚠️ ブラウザが閉じられましたが、スケジューラが実行中のためサーバーを維持します。")
         return jsonify({"status": "kept_alive"})
     print("🛑 ブラウザが閉じられました。サーバーを終了します。")
+    _flush_logs()
     os._exit(0)
 
 
 # ---------------------------------------------------------------------------
 # グローバル状態
 # ---------------------------------------------------------------------------
-_scheduler_running = False
-_scheduler_thread = None
-_execution_logs: list[dict] = []
+# セット = 停止中。クリア中はスケジューラが動いている。
+# ゆらぎ遅延中の投稿ジョブは wait() で待つので、停止と同時に中断される。
+_stop_event = threading.Event()
+_stop_event.set()
+_scheduler: BackgroundScheduler | None = None
+_scheduler_lock = threading.Lock()  # start / stop の同時実行を防ぐ
+_log_lock = threading.Lock()
 _MAX_LOGS = 200
+_execution_logs: deque[dict] = deque(maxlen=_MAX_LOGS)  # 上限超過分は自動で古い順に破棄
 
 # ログ出力ディレクトリ
 _LOG_DIR = _PROJECT_ROOT / "logs"
 _LOG_DIR.mkdir(exist_ok=True)
 
 
+# マスク対象の API キー名（画面表示・エラーメッセージ共通）
+_MASKED_KEYS = frozenset({
+    "gemini_api_key", "x_api_key", "x_api_secret",
+    "x_access_token", "x_access_token_secret", "threads_api_key",
+})
+
+
+@lru_cache(maxsize=8)
+def _mask_pattern(secrets: tuple[str, ...]) -> re.Pattern:
+    """秘密値のいずれかに一致する正規表現。長い値を先に並べて部分一致の取りこぼしを防ぐ。"""
+    return re.compile("|".join(re.escape(v) for v in secrets))
+
+
 def _sanitize_error(error: Exception, api_keys: dict) -> str:
     """エラーメッセージからAPIキーをマスクして漏洩を防ぐ。"""
     msg = str(error)
-    for key_field in ("x_api_key", "x_api_secret", "x_access_token",
-                      "x_access_token_secret", "gemini_api_key", "threads_api_key"):
-        val = api_keys.get(key_field, "")
-        if val and val in msg:
-            msg = msg.replace(val, "***")
-    return msg
+    # 多くのエラー（通信・入力エラー）はキーを含まないので、置換の準備をせず返す
+    present = {v for k in _MASKED_KEYS if (v := api_keys.get(k, "")) and v in msg}
+    if not present:
+        return msg
+    secrets = tuple(sorted(present, key=lambda v: (-len(v), v)))
+    return _mask_pattern(secrets).sub("***", msg)
 
 
 def _threads_error_hint(error: Exception) -> str:
@@ -113,24 +194,168 @@ def _threads_error_hint(error: Exception) -> str:
     return msg
 
 
+def _scheduler_running() -> bool:
+    """スケジューラが実行中かどうか。"""
+    return not _stop_event.is_set()
+
+
 def _add_log(level: str, message: str):
-    """実行ログを追加する。ファイルにも出力する。"""
-    ts = datetime.now().strftime("%H:%M:%S")
-    _execution_logs.append({
-        "time": ts,
-        "level": level,
-        "message": message,
-    })
-    if len(_execution_logs) > _MAX_LOGS:
-        _execution_logs.pop(0)
-    # ファイルログ
+    """実行ログを追加する。ファイルへの書き込みはバックグラウンドでまとめて行う。"""
+    now = datetime.now()
+    ts = now.strftime("%H:%M:%S")
+    with _log_lock:
+        _execution_logs.append({
+            "time": ts,
+            "level": level,
+            "message": message,
+        })
+    # ファイルログ（日付, 行）をキューに積む
+    _log_queue.put((now.strftime("%Y-%m-%d"), f"[{ts}] [{level}] {message}\n"))
+
+
+# ファイルログの書き込み待ち。_log_writer スレッドが溜まった分を一度に書き出す
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+
+_current_log: dict = {"day": "", "path": None}
+
+
+def _log_path(day: str) -> Path:
+    """その日のログファイルのパス。日付が変わったときだけ組み立て直す。"""
+    if day != _current_log["day"]:
+        _current_log["path"] = _LOG_DIR / f"{day}.log"
+        _current_log["day"] = day
+    return _current_log["path"]
+
+
+def _write_log_lines(batch: list[tuple[str, str]]):
+    """(日付, 行) のリストを日付ごとのログファイルに追記する。"""
+    by_day: dict[str, list[str]] = {}
+    for day, line in batch:
+        by_day.setdefault(day, []).append(line)
+    for day, lines in by_day.items():
+        try:
+            with open(_log_path(day), "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        except Exception:
+            pass
+
+
+def _drain_log_queue(batch: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    """キューに残っている行をブロックせずに batch へ移す。"""
     try:
-        today = datetime.now().strftime("%Y-%m-%d")
-        log_file = _LOG_DIR / f"{today}.log"
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(f"[{ts}] [{level}] {message}\n")
-    except Exception:
-        pass
+        while True:
+            batch.append(_log_queue.get_nowait())
+    except queue.Empty:
+        return batch
+
+
+def _log_writer():
+    """ログ行を待ち受け、届いた分をまとめてファイルに書き出す。"""
+    while True:
+        _write_log_lines(_drain_log_queue([_log_queue.get()]))
+
+
+def _flush_logs():
+    """未書き込みのログ行を同期的に書き出す（プロセス終了前に呼ぶ）。"""
+    _write_log_lines(_drain_log_queue([]))
+
+
+threading.Thread(target=_log_writer, daemon=True, name="log-writer").start()
+
+
+def _recent_logs(count: int) -> list[dict]:
+    """直近 count 件の実行ログをロックを取ってコピーする。
+
+    deque 全体を list 化してから切り出すのではなく、必要な末尾だけを取り出す。
+    count が 0 以下なら全件を返す（従来の [-count:] と同じ挙動）。
+    """
+    with _log_lock:
+        total = len(_execution_logs)
+        start = total - count if 0 < count < total else 0
+        return list(islice(_execution_logs, start, None))
+
+
+# 取得中のキー → その呼び出しの Future。同じキーの同時呼び出しは先行する 1 件の結果を待つ
+# （結果は呼び出しごとの Future に載るので、完了後はどこにも残らない）
+_inflight: dict[str, concurrent.futures.Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _single_flight(key: str, fetch):
+    """同じ key の fetch() が実行中なら、その完了を待って結果を共有する。"""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = concurrent.futures.Future()
+    if not leader:
+        return future.result()  # 先行呼び出しの例外はそのまま送出される
+
+    try:
+        value = fetch()
+    except BaseException as e:  # 待っている側が永久に止まらないよう何であれ伝える
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(value)
+        return value
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _disk_memo(namespace: str, key_parts, ttl: float, fetch, force: bool = False):
+    """fetch() の結果を .cache/<namespace>/ に TTL 付きで保存して使い回す。
+
+    key_parts は JSON 化できる値で、同じ引数なら同じキャッシュファイルになる。
+    force=True の場合はキャッシュを無視して取得し直す。
+    同じ引数の取得が並行して走っている場合は、その結果を待って共有する。
+    """
+    key = hashlib.sha1(
+        orjson.dumps(key_parts, option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+    path = _CACHE_DIR / namespace / f"{key}.json"
+    if not force:
+        try:
+            entry = orjson.loads(path.read_bytes())
+            if time.time() - entry["ts"] < ttl:
+                return entry["data"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def fetch_and_store():
+        data = fetch()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(orjson.dumps({"ts": time.time(), "data": data}))
+        except OSError:
+            pass  # キャッシュ書き込み失敗は致命的ではない
+        return data
+
+    return _single_flight(f"{namespace}/{key}", fetch_and_store)
+
+
+_TRENDS_DISK_TTL = 600   # 10 分
+_NOTE_DISK_TTL = 3600    # 1 時間
+
+
+def _fetch_trends_cached(rss_urls: list[str], blacklist: list[str], force: bool = False) -> list[dict]:
+    """logic.fetch_trends をディスクキャッシュ越しに呼ぶ。"""
+    return _disk_memo(
+        "trends", [sorted(rss_urls), sorted(blacklist)], _TRENDS_DISK_TTL,
+        lambda: logic.fetch_trends(rss_urls=rss_urls, blacklist=blacklist),
+        force=force,
+    )
+
+
+def _fetch_note_articles_cached(note_url: str, force: bool = False) -> list[dict]:
+    """logic.fetch_note_articles をディスクキャッシュ越しに呼ぶ。"""
+    return _disk_memo(
+        "note", [note_url], _NOTE_DISK_TTL,
+        lambda: logic.fetch_note_articles(note_url),
+        force=force,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -144,9 +369,9 @@ def index():
 
 @app.route("/icon.ico")
 def favicon():
-    return app.response_class(
-        (_PROJECT_ROOT / "icon.ico").read_bytes(),
-        mimetype="image/x-icon",
+    return send_from_directory(
+        str(_PROJECT_ROOT), "icon.ico",
+        mimetype="image/x-icon", max_age=86400,
     )
 
 # ---------------------------------------------------------------------------
@@ -156,16 +381,27 @@ def favicon():
 @app.route("/api/config", methods=["GET"])
 def get_config():
     """設定を取得する。APIキーはマスクして返す。"""
-    config = load_config()
+    config = peek_config()
     # フロントに返す際はAPIキーをマスク
     safe_config = _mask_api_keys(config)
-    return jsonify(safe_config)
+    return _conditional_json(safe_config)
 
 
 @app.route("/api/config/raw", methods=["GET"])
 def get_config_raw():
     """設定を生値で取得する（設定画面での表示用）。"""
-    return jsonify(load_config())
+    return _conditional_json(peek_config())
+
+
+def _conditional_json(payload):
+    """ETag 付きで JSON を返す。If-None-Match が一致すれば本文なしの 304 になる。
+
+    no-cache で毎回再検証させるので、設定変更は即座に反映される。
+    """
+    resp = jsonify(payload)
+    resp.add_etag()
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
 
 
 @app.route("/api/config", methods=["POST"])
@@ -177,6 +413,7 @@ def update_config():
     config = load_config()
     config.update(data)
     save_config(config)
+    _status_cache["keys"] = None
     return jsonify({"status": "ok"})
 
 
@@ -192,6 +429,7 @@ def update_config_section(section):
     else:
         config[section] = data
     save_config(config)
+    _status_cache["keys"] = None
     return jsonify({"status": "ok"})
 
 
@@ -200,26 +438,45 @@ def reset_config():
     """設定を初期値にリセットする。"""
     default = get_default_config()
     save_config(default)
+    _status_cache["keys"] = None
     return jsonify({"status": "ok"})
 
 
 def _mask_api_keys(config: dict) -> dict:
-    """APIキーをマスクする。"""
-    import copy
-    masked = copy.deepcopy(config)
-    api = masked.get("api_keys", {})
-    for key in ("gemini_api_key", "x_api_key", "x_api_secret",
-                "x_access_token", "x_access_token_secret", "threads_api_key"):
-        val = api.get(key, "")
+    """APIキーをマスクする。
+
+    書き換えるのは api_keys だけなので、そこだけを浅くコピーする。
+    """
+    masked = dict(config)
+    api = dict(config.get("api_keys", {}))
+    masked["api_keys"] = api
+    for key in _MASKED_KEYS & api.keys():
+        val = api[key]
         if val:
             api[key] = val[:4] + "***" + val[-4:] if len(val) > 8 else "***"
     return masked
 
 
+# tkinter は生成したスレッドからしか操作できないため、ダイアログは常に同じ
+# 1 本のスレッドで開き、非表示のルートウィンドウも使い回す（Tcl の初期化は 1 回だけ）
+_dialog_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="dialog")
+_tk_root = None
+
+
+def _get_tk_root():
+    """非表示の Tk ルートを返す。_dialog_pool のスレッドからのみ呼ぶこと。"""
+    global _tk_root
+    if _tk_root is None:
+        import tkinter as tk
+        _tk_root = tk.Tk()
+        _tk_root.withdraw()
+        _tk_root.attributes("-topmost", True)
+    return _tk_root
+
+
 @app.route("/api/config/export", methods=["POST"])
 def export_config_with_dialog():
     """設定をファイルダイアログで保存先を選んでエクスポートする。"""
-    import json
     data = request.get_json()
     if not data or "config" not in data:
         return jsonify({"error": "No config data provided"}), 400
@@ -228,33 +485,27 @@ def export_config_with_dialog():
     default_name = data.get("filename", "autopost_config.json")
 
     def _open_save_dialog():
-        """tkinter のファイル保存ダイアログを別スレッドで開く。"""
-        import tkinter as tk
+        """tkinter のファイル保存ダイアログを開く（_dialog_pool のスレッドで実行）。"""
         from tkinter import filedialog
-        root = tk.Tk()
-        root.withdraw()
-        root.attributes("-topmost", True)
         filepath = filedialog.asksaveasfilename(
+            parent=_get_tk_root(),
             title="設定のエクスポート先を選択",
             initialfile=default_name,
             defaultextension=".json",
             filetypes=[("JSON ファイル", "*.json"), ("すべてのファイル", "*.*")],
         )
-        root.destroy()
         return filepath
 
-    # tkinter は別スレッドで実行
-    import concurrent.futures
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future = executor.submit(_open_save_dialog)
-        filepath = future.result(timeout=120)
+    # tkinter は専用スレッドで実行
+    filepath = _dialog_pool.submit(_open_save_dialog).result(timeout=120)
 
     if not filepath:
         return jsonify({"status": "cancelled"})
 
     try:
-        json_str = json.dumps(export_data, ensure_ascii=False, indent=2)
-        Path(filepath).write_text(json_str, encoding="utf-8")
+        Path(filepath).write_bytes(
+            orjson.dumps(export_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        )
         return jsonify({"status": "ok", "path": filepath})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -267,23 +518,45 @@ def export_config_with_dialog():
 # --- RSS キャッシュ ---
 _trends_cache: dict = {"data": [], "ts": 0}
 _TRENDS_CACHE_TTL = 300   # 5 分
+_trends_lock = threading.Lock()
+_trends_inflight: concurrent.futures.Future | None = None  # 取得中なら後続はこれを待つ
+
 
 @app.route("/api/trends", methods=["GET"])
 def get_trends():
-    """トレンドを取得する（5分キャッシュ付き）。"""
+    """トレンドを取得する（5分キャッシュ付き）。
+
+    キャッシュ切れの状態で同時に呼ばれても、RSS の取得は先頭の 1 件だけが行う。
+    """
+    global _trends_inflight
     force = request.args.get("force", "false") == "true"
-    now = time.time()
-    if not force and _trends_cache["data"] and (now - _trends_cache["ts"]) < _TRENDS_CACHE_TTL:
-        return jsonify({"trends": _trends_cache["data"], "cached": True})
-    config = load_config()
-    sources = config.get("sources", {})
-    rss_urls = sources.get("rss_urls", [])
-    blacklist = sources.get("blacklist", [])
+    with _trends_lock:
+        now = time.time()
+        if not force and _trends_cache["data"] and (now - _trends_cache["ts"]) < _TRENDS_CACHE_TTL:
+            return jsonify({"trends": _trends_cache["data"], "cached": True})
+        fut = _trends_inflight
+        leader = fut is None
+        if leader:
+            fut = _trends_inflight = concurrent.futures.Future()
+
+    if leader:
+        try:
+            sources = peek_config().get("sources", {})
+            trends = _fetch_trends_cached(
+                sources.get("rss_urls", []), sources.get("blacklist", []), force=force,
+            )
+            with _trends_lock:
+                _trends_cache["data"] = trends
+                _trends_cache["ts"] = now
+            fut.set_result(trends)
+        except Exception as e:
+            fut.set_exception(e)
+        finally:
+            with _trends_lock:
+                _trends_inflight = None
+
     try:
-        trends = logic.fetch_trends(rss_urls=rss_urls, blacklist=blacklist)
-        _trends_cache["data"] = trends
-        _trends_cache["ts"] = now
-        return jsonify({"trends": trends})
+        return jsonify({"trends": fut.result()})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -291,7 +564,7 @@ def get_trends():
 @app.route("/api/trends/analyze", methods=["POST"])
 def analyze_trends():
     """トレンドをペルソナとの相性で分析する。"""
-    config = load_config()
+    config = peek_config()
     api_keys = config.get("api_keys", {})
     persona = config.get("persona", {})
     data = request.get_json() or {}
@@ -315,7 +588,7 @@ def analyze_trends():
 @app.route("/api/generate", methods=["POST"])
 def generate_post():
     """投稿を生成する。"""
-    config = load_config()
+    config = peek_config()
     data = request.get_json() or {}
 
     post_type = data.get("post_type", "A")
@@ -324,7 +597,6 @@ def generate_post():
     style_name = data.get("style")
     use_smart = data.get("smart_analysis", False)
 
-    results = []
     api_keys = config.get("api_keys", {})
     persona_text = config.get("persona", {}).get("generated_text", "")
     writing_styles = config.get("prompt_settings", {}).get("writing_styles", [])
@@ -341,22 +613,32 @@ def generate_post():
         trends_list = []
     elif post_type in ("A",) and not trend:
         try:
-            trends_list = logic.fetch_trends(rss_urls=rss_urls, blacklist=blacklist)
+            trends_list = _fetch_trends_cached(rss_urls, blacklist)
         except Exception:
             trends_list = []
     else:
         trends_list = [trend] if trend else []
 
-    for _ in range(count):
+    # 指定スタイルはリクエストごとに一度だけ引く
+    styles_by_name = {s.get("name"): s for s in writing_styles if s.get("name")}
+    named_style = styles_by_name.get(style_name) if style_name else None
+
+    # フィードバック（smart analysis）も全件共通なので一度だけ作る
+    feedback = ""
+    if use_smart and post_type != "C":
+        try:
+            feedback = engagement.get_feedback_for_prompt()
+        except Exception:
+            feedback = ""
+
+    def _generate_one() -> dict:
         try:
             if post_type == "C":
                 # note告知
                 articles = config.get("note_promotion", {}).get("articles", [])
                 if not articles:
-                    results.append({"error": "note記事が登録されていません"})
-                    continue
-                import random as _rnd
-                article = _rnd.choice(articles)
+                    return {"error": "note記事が登録されていません"}
+                article = random.choice(articles)
                 promotion_styles = config.get("note_promotion", {}).get("promotion_styles", [])
                 promo_style = logic.select_note_promotion_style(promotion_styles)
                 post = logic.generate_note_promotion(
@@ -367,21 +649,8 @@ def generate_post():
                     model=gemini_model,
                 )
             else:
-                # スタイル選択
-                if style_name:
-                    style = next((s for s in writing_styles if s.get("name") == style_name), None)
-                    if not style:
-                        style = logic.select_style(writing_styles)
-                else:
-                    style = logic.select_style(writing_styles)
-
-                # フィードバック（smart analysis）
-                feedback = ""
-                if use_smart:
-                    try:
-                        feedback = engagement.get_feedback_for_prompt()
-                    except Exception:
-                        feedback = ""
+                # スタイル選択（指定がなければ重み付きランダム）
+                style = named_style or logic.select_style(writing_styles)
 
                 post = logic.generate_post(
                     style=style,
@@ -395,9 +664,18 @@ def generate_post():
                     feedback=feedback,
                 )
             post = logic.sanitize_post(post)
-            results.append({"text": post, "char_count": len(post)})
+            return {"text": post, "char_count": len(post)}
         except Exception as e:
-            results.append({"error": str(e)})
+            return {"error": str(e)}
+
+    # Gemini 呼び出しは通信待ちが大半なので、複数件はスレッドで並行生成する
+    # （レート制限を考慮して同時実行は最大5件）。結果は依頼順を保つ
+    if count > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(count, 5)) as pool:
+            futures = [pool.submit(_generate_one) for _ in range(count)]
+            results = [f.result() for f in futures]
+    else:
+        results = [_generate_one() for _ in range(count)]
 
     return jsonify({"posts": results})
 
@@ -406,14 +684,47 @@ def generate_post():
 # 投稿実行 API
 # ---------------------------------------------------------------------------
 
+# 投稿ジョブ。X / Threads への送信は HTTP ワーカーを塞がないよう別スレッドで行う
+_post_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="post")
+_post_jobs: dict[str, dict] = {}
+_post_jobs_lock = threading.Lock()
+_POST_JOB_TTL = 3600  # 結果を保持する秒数
+# X / Threads への個別送信用。両方に投稿する場合は並行して送る
+_platform_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="platform")
+
+
+def _submit_post_job(fn, *args) -> str:
+    """fn(*args) をバックグラウンドで実行し、状態確認用の job_id を返す。"""
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    job = {"status": "pending", "created": now, "result": None}
+    with _post_jobs_lock:
+        for old_id in [j for j, v in _post_jobs.items() if now - v["created"] > _POST_JOB_TTL]:
+            del _post_jobs[old_id]
+        _post_jobs[job_id] = job
+
+    def run():
+        try:
+            result, status = fn(*args), "done"
+        except Exception as e:
+            traceback.print_exc()
+            result, status = {"error": str(e)}, "error"
+        with _post_jobs_lock:
+            job["result"] = result
+            job["status"] = status
+
+    _post_executor.submit(run)
+    return job_id
+
+
 @app.route("/api/post", methods=["POST"])
 def execute_post():
     """X / Threads に投稿する。画像付きにも対応。"""
-    config = load_config()
+    config = peek_config()
     api_keys = config.get("api_keys", {})
 
     # JSON or FormData の両方に対応
-    if request.content_type and "multipart/form-data" in request.content_type:
+    if request.mimetype == "multipart/form-data":
         text = request.form.get("text", "")
         post_to_x = request.form.get("post_to_x", "true") == "true"
         post_to_threads = request.form.get("post_to_threads", "false") == "true"
@@ -427,28 +738,68 @@ def execute_post():
         alt_text = ""
         image_file = None
 
-    # 画像を一時ファイルに保存
-    image_path = None
+    # 画像はメモリ上に保持する（10MB を超えた分だけ一時ファイルに退避される）
+    image_buf = None
+    image_name = None
     if image_file and image_file.filename:
-        import tempfile
         suffix = Path(image_file.filename).suffix or ".png"
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=str(_PROJECT_ROOT))
-        image_file.save(tmp)
-        tmp.close()
-        image_path = tmp.name
-
+        image_buf = tempfile.SpooledTemporaryFile(max_size=10 << 20)
+        shutil.copyfileobj(image_file.stream, image_buf, length=1 << 20)
+        image_buf.seek(0)
+        image_name = f"upload{suffix}"
+
+    # 送信には数秒かかるため、ジョブとして投入してすぐに job_id を返す
+    job_id = _submit_post_job(
+        _run_post, text, api_keys, post_to_x, post_to_threads, alt_text, image_buf, image_name,
+    )
+    return jsonify({"job_id": job_id, "status": "pending"}), 202
+
+
+@app.route("/api/post/<job_id>", methods=["GET"])
+def get_post_job(job_id):
+    """投稿ジョブの状態を返す。完了していれば各プラットフォームの結果も含める。"""
+    with _post_jobs_lock:
+        job = _post_jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "ジョブが見つかりません"}), 404
+        payload = {"job_id": job_id, "status": job["status"]}
+        if job["result"] is not None:
+            payload.update(job["result"])
+    return jsonify(payload)
+
+
+def _run_post(
+    text: str,
+    api_keys: dict,
+    post_to_x: bool,
+    post_to_threads: bool,
+    alt_text: str,
+    image_buf,
+    image_name: str | None,
+) -> dict:
+    """X / Threads への送信と履歴記録を行い、プラットフォームごとの結果を返す。"""
     results = {}
     any_success = False
 
-    if post_to_x:
+    # X と Threads は独立したサービスなので並行して送信する
+    fut_x = _platform_pool.submit(
+        logic._retry_api_call,
+        logic.post_to_x,
+        text=text,
+        api_keys=api_keys,
+        image_path=image_name,
+        image_file=image_buf,
+        alt_text=alt_text or None,
+    ) if post_to_x else None
+    # Threads は公開URLが必要なため、ローカル画像は送れない → テキストのみ
+    fut_t = _platform_pool.submit(
+        logic._retry_api_call,
+        logic.post_to_threads, text=text, api_key=api_keys.get("threads_api_key", ""),
+    ) if post_to_threads else None
+
+    if fut_x is not None:
         try:
-            logic._retry_api_call(
-                logic.post_to_x,
-                text=text,
-                api_keys=api_keys,
-                image_path=image_path,
-                alt_text=alt_text or None,
-            )
+            fut_x.result()
             results["x"] = "success"
             any_success = True
             _add_log("success", f"X投稿成功: {text[:30]}...")
@@ -457,12 +808,9 @@ def execute_post():
             results["x"] = f"error: {safe_msg}"
             _add_log("error", f"X投稿失敗: {safe_msg}")
 
-    if post_to_threads:
+    if fut_t is not None:
         try:
-            # Threads は公開URLが必要なため、ローカル画像は送れない → テキストのみ
-            logic._retry_api_call(
-                logic.post_to_threads, text=text, api_key=api_keys.get("threads_api_key", "")
-            )
+            fut_t.result()
             results["threads"] = "success"
             any_success = True
             _add_log("success", f"Threads投稿成功")
@@ -472,12 +820,9 @@ def execute_post():
             results["threads"] = f"error: {safe_msg}"
             _add_log("error", f"Threads投稿失敗: {safe_msg}")
 
-    # 一時ファイルを削除
-    if image_path:
-        try:
-            Path(image_path).unlink(missing_ok=True)
-        except Exception:
-            pass
+    # 画像バッファを解放
+    if image_buf is not None:
+        image_buf.close()
 
     # 投稿成功時に履歴に記録
     if any_success:
@@ -491,7 +836,7 @@ def execute_post():
             platform=",".join(platforms),
         )
 
-    return jsonify(results)
+    return results
 
 
 # ---------------------------------------------------------------------------
@@ -502,21 +847,24 @@ def execute_post():
 def scheduler_status():
     """スケジューラの状態を返す。"""
     return jsonify({
-        "running": _scheduler_running,
-        "logs": _execution_logs[-50:],
+        "running": _scheduler_running(),
+        "logs": _recent_logs(50),
     })
 
 
 @app.route("/api/scheduler/start", methods=["POST"])
 def scheduler_start():
     """スケジューラを開始する。"""
-    global _scheduler_running, _scheduler_thread
-    if _scheduler_running:
-        return jsonify({"status": "already_running"})
-
-    _scheduler_running = True
-    _scheduler_thread = threading.Thread(target=_scheduler_loop, daemon=True)
-    _scheduler_thread.start()
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler_running():
+            return jsonify({"status": "already_running"})
+
+        # shutdown 済みの BackgroundScheduler は再利用できないため毎回作り直す
+        _scheduler = BackgroundScheduler()
+        _setup_schedules(_scheduler)
+        _scheduler.start()
+        _stop_event.clear()
     _add_log("info", "スケジューラ開始")
     return jsonify({"status": "started"})
 
@@ -524,61 +872,73 @@ def scheduler_start():
 @app.route("/api/scheduler/stop", methods=["POST"])
 def scheduler_stop():
     """スケジューラを停止する。"""
-    global _scheduler_running
-    _scheduler_running = False
+    global _scheduler
+    with _scheduler_lock:
+        _stop_event.set()
+        if _scheduler is not None:
+            _scheduler.shutdown(wait=False)
+            _scheduler = None
     _add_log("info", "スケジューラ停止")
     return jsonify({"status": "stopped"})
 
 
-def _scheduler_loop():
-    """スケジューラのメインループ。"""
-    global _scheduler_running
-    import schedule as sched
-
-    sched.clear()
-    _setup_schedules(sched)
+def _setup_schedules(scheduler: BackgroundScheduler):
+    """config の fixed_times からスケジュールを設定する。
 
-    while _scheduler_running:
-        sched.run_pending()
-        time.sleep(10)
-
-
-def _setup_schedules(sched):
-    """config の fixed_times からスケジュールを設定する。"""
-    import random
-    config = load_config()
+    APScheduler の CronTrigger は次の発火時刻まで待機するため、
+    定期ポーリングは不要。曜日の指定も trigger 側で行う。
+    """
+    config = peek_config()
     schedule_conf = config.get("schedule", {})
     fixed_times = schedule_conf.get("fixed_times", [])
     jitter = schedule_conf.get("jitter_minutes", 15)
     active_days = schedule_conf.get("active_days", list(range(7)))
+    # datetime.weekday() と同じく 0=月曜 … 6=日曜
+    day_of_week = ",".join(str(d) for d in sorted(active_days)) if active_days else None
 
     for t in fixed_times:
-        sched.every().day.at(t).do(
-            _scheduled_post, jitter=jitter, active_days=active_days
+        try:
+            hour, minute = (int(v) for v in t.split(":"))
+        except ValueError:
+            _add_log("error", f"時刻の形式が不正です: {t}")
+            continue
+        scheduler.add_job(
+            _scheduled_post,
+            CronTrigger(hour=hour, minute=minute, day_of_week=day_of_week),
+            kwargs={"jitter": jitter},
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=60,
         )
 
 
-def _scheduled_post(jitter: int = 0, active_days: list = None):
+def _scheduled_post(jitter: int = 0):
     """スケジュール実行時のコールバック。"""
-    import random
-    now = datetime.now()
-    if active_days and now.weekday() not in active_days:
-        _add_log("skip", f"今日 ({now.strftime('%A')}) は休止日")
-        return
-
     if jitter > 0:
         delay = random.randint(0, jitter * 60)
         _add_log("info", f"ゆらぎ遅延: {delay // 60}分{delay % 60}秒")
-        time.sleep(delay)
+        if _stop_event.wait(delay):
+            _add_log("skip", "スケジューラ停止のため投稿を中止")
+            return
 
-    config = load_config()
+    # 設定はここで一度だけ読み、以降は同じスナップショットを使う
+    config = peek_config()
+    api_keys = config.get("api_keys", {})
+    gemini_key = api_keys.get("gemini_api_key", "")
+    gemini_model = api_keys.get("gemini_model", "gemini-2.5-flash")
+    persona_text = config.get("persona", {}).get("generated_text", "")
+    prompt_settings = config.get("prompt_settings", {})
+    sources = config.get("sources", {})
+    schedule_conf = config.get("schedule", {})
+    post_type_conf = config.get("post_type", {})
+    note_conf = config.get("note_promotion", {})
     try:
         # タイプ選択
-        post_type = logic.select_post_type(config.get("post_type", {}))
+        post_type = logic.select_post_type(post_type_conf)
         _add_log("info", f"投稿タイプ: {post_type}")
 
         if post_type == "C":
-            articles = config.get("note_promotion", {}).get("articles", [])
+            articles = note_conf.get("articles", [])
             if not articles:
                 _add_log("skip", "note記事未登録 → スキップ")
                 return
@@ -588,52 +948,57 @@ def _scheduled_post(jitter: int = 0, active_days: list = None):
             if not available:
                 _add_log("skip", "全note記事が直近投稿済み → スキップ")
                 return
-            import random as _rnd
-            article = _rnd.choice(available)
-            promotion_styles = config.get("note_promotion", {}).get("promotion_styles", [])
-            promo_style = logic.select_note_promotion_style(promotion_styles)
-            api_keys = config.get("api_keys", {})
+            article = random.choice(available)
+            promo_style = logic.select_note_promotion_style(note_conf.get("promotion_styles", []))
             text = logic.generate_note_promotion(
                 article=article,
                 promotion_style=promo_style,
-                persona=config.get("persona", {}).get("generated_text", ""),
-                api_key=api_keys.get("gemini_api_key", ""),
-                model=api_keys.get("gemini_model", "gemini-2.5-flash"),
+                persona=persona_text,
+                api_key=gemini_key,
+                model=gemini_model,
             )
         else:
-            api_keys = config.get("api_keys", {})
-            writing_styles = config.get("prompt_settings", {}).get("writing_styles", [])
-            style = logic.select_style_for_type(post_type, writing_styles, config.get("post_type", {}))
-            rss_urls = config.get("sources", {}).get("rss_urls", [])
-            blacklist = config.get("sources", {}).get("blacklist", [])
-            trends = logic.fetch_trends(rss_urls=rss_urls, blacklist=blacklist) if post_type == "A" else []
+            writing_styles = prompt_settings.get("writing_styles", [])
+            style = logic.select_style_for_type(post_type, writing_styles, post_type_conf)
+            if post_type == "A":
+                trends = _fetch_trends_cached(sources.get("rss_urls", []), sources.get("blacklist", []))
+            else:
+                trends = []
             text = logic.generate_post(
                 style=style,
                 trends=trends,
-                persona=config.get("persona", {}).get("generated_text", ""),
-                guidelines=config.get("prompt_settings", {}).get("writing_guidelines", ""),
-                ng_expressions=config.get("prompt_settings", {}).get("ng_expressions", ""),
-                api_key=api_keys.get("gemini_api_key", ""),
-                model=api_keys.get("gemini_model", "gemini-2.5-flash"),
+                persona=persona_text,
+                guidelines=prompt_settings.get("writing_guidelines", ""),
+                ng_expressions=prompt_settings.get("ng_expressions", ""),
+                api_key=gemini_key,
+                model=gemini_model,
             )
 
         text = logic.sanitize_post(text)
         _add_log("success", f"生成完了: {text[:40]}...")
 
-        schedule_conf = config.get("schedule", {})
-        api_keys = config.get("api_keys", {})
-        platforms = []
+        # X と Threads へ並行して送信し、成功した分だけ履歴に残す
+        futures = {}
         if schedule_conf.get("post_to_x", True):
-            logic._retry_api_call(logic.post_to_x, text=text, api_keys=api_keys)
-            _add_log("success", "X投稿成功")
-            platforms.append("x")
-
+            futures["x"] = _platform_pool.submit(
+                logic._retry_api_call, logic.post_to_x, text=text, api_keys=api_keys,
+            )
         if schedule_conf.get("post_to_threads", False):
-            logic._retry_api_call(
-                logic.post_to_threads, text=text, api_key=api_keys.get("threads_api_key", "")
+            futures["threads"] = _platform_pool.submit(
+                logic._retry_api_call,
+                logic.post_to_threads, text=text, api_key=api_keys.get("threads_api_key", ""),
             )
-            _add_log("success", "Threads投稿成功")
-            platforms.append("threads")
+
+        platforms = []
+        for platform, fut in futures.items():
+            label = "X" if platform == "x" else "Threads"
+            try:
+                fut.result()
+            except Exception as e:
+                _add_log("error", f"{label}投稿失敗: {_sanitize_error(e, api_keys)}")
+                continue
+            _add_log("success", f"{label}投稿成功")
+            platforms.append(platform)
 
         # 投稿成功時に履歴に記録（ダッシュボードに反映）
         if platforms:
@@ -643,7 +1008,6 @@ def _scheduled_post(jitter: int = 0, active_days: list = None):
             )
 
     except Exception as e:
-        api_keys = config.get("api_keys", {})
         safe_msg = _sanitize_error(e, api_keys)
         _add_log("error", f"投稿失敗: {safe_msg}")
         traceback.print_exc()
@@ -653,59 +1017,75 @@ def _scheduled_post(jitter: int = 0, active_days: list = None):
 # 最適投稿時間 API（動的分析）
 # ---------------------------------------------------------------------------
 
+# 履歴ファイルが変わるまで集計結果を使い回す
+_optimal_cache: dict = {"key": None, "value": None}
+
+# 時間帯ラベル（0〜23時）。起動時に一度だけ展開する
+_HOUR_LABEL_RANGES = (
+    (range(5, 9), "朝の活動時間"),
+    (range(9, 12), "午前中"),
+    (range(12, 14), "昼休み"),
+    (range(14, 17), "午後"),
+    (range(17, 20), "帰宅時間帯"),
+    (range(20, 22), "ゴールデンタイム"),
+    (range(22, 25), "就寝前"),
+)
+_HOUR_LABELS = tuple(
+    next((label for rng, label in _HOUR_LABEL_RANGES if h in rng), "その他")
+    for h in range(24)
+)
+
+
 @app.route("/api/optimal-times", methods=["GET"])
 def get_optimal_times():
     """エンゲージメントデータからピーク時間帯を算出する。"""
     try:
-        history = engagement.get_post_history()
-        if len(history) < 5:
-            return jsonify({"times": [], "message": "データ不足（5件以上必要）"})
-
-        hourly = {}  # hour -> list of engagement values
-        for entry in history:
-            ts = entry.get("timestamp", "")
-            if not ts or len(ts) < 13:
-                continue
-            try:
-                hour = int(ts[11:13])
-            except (ValueError, IndexError):
-                continue
-            eng = (entry.get("likes", 0) or 0) + (entry.get("impressions", 0) or 0) * 0.01
-            if hour not in hourly:
-                hourly[hour] = []
-            hourly[hour].append(eng)
-
-        if not hourly:
-            return jsonify({"times": [], "message": "時刻付きデータなし"})
-
-        avg_eng = {h: sum(v) / len(v) for h, v in hourly.items()}
-        top_hours = sorted(avg_eng, key=avg_eng.get, reverse=True)[:5]
-        top_hours.sort()
-
-        labels = {
-            range(5, 9): "朝の活動時間",
-            range(9, 12): "午前中",
-            range(12, 14): "昼休み",
-            range(14, 17): "午後",
-            range(17, 20): "帰宅時間帯",
-            range(20, 22): "ゴールデンタイム",
-            range(22, 25): "就寝前",
-        }
-
-        times = []
-        for h in top_hours:
-            label = "その他"
-            for rng, l in labels.items():
-                if h in rng:
-                    label = l
-                    break
-            times.append({"time": f"{h:02d}:00-{h+1:02d}:00", "label": label, "score": round(avg_eng[h], 1)})
-
-        return jsonify({"times": times})
+        key = engagement.history_version()
+        if key is not None and key == _optimal_cache["key"]:
+            return jsonify(_optimal_cache["value"])
+        result = _compute_optimal_times(engagement.get_post_history())
+        _optimal_cache["key"] = key
+        _optimal_cache["value"] = result
+        return jsonify(result)
     except Exception as e:
         return jsonify({"times": [], "error": str(e)})
 
 
+def _compute_optimal_times(history: list[dict]) -> dict:
+    """投稿履歴を時間帯ごとに集計し、平均エンゲージメント上位5時間帯を返す。"""
+    if len(history) < 5:
+        return {"times": [], "message": "データ不足（5件以上必要）"}
+
+    # 時間帯ごとの合計と件数を 24 要素の配列で 1 パス集計する
+    sums = [0.0] * 24
+    counts = [0] * 24
+    for entry in history:
+        ts = entry.get("timestamp", "")
+        if not ts or len(ts) < 13:
+            continue
+        try:
+            hour = int(ts[11:13])
+        except ValueError:
+            continue
+        if not 0 <= hour < 24:
+            continue
+        sums[hour] += (entry.get("likes", 0) or 0) + (entry.get("impressions", 0) or 0) * 0.01
+        counts[hour] += 1
+
+    avg_eng = {h: sums[h] / c for h, c in enumerate(counts) if c}
+    if not avg_eng:
+        return {"times": [], "message": "時刻付きデータなし"}
+
+    top_hours = sorted(h for h, _ in heapq.nlargest(5, avg_eng.items(), key=lambda kv: kv[1]))
+
+    times = [
+        {"time": f"{h:02d}:00-{h+1:02d}:00", "label": _HOUR_LABELS[h], "score": round(avg_eng[h], 1)}
+        for h in top_hours
+    ]
+
+    return {"times": times}
+
+
 # ---------------------------------------------------------------------------
 # スケジューラ プレビュー API
 # ---------------------------------------------------------------------------
@@ -713,7 +1093,7 @@ def get_optimal_times():
 @app.route("/api/scheduler/preview", methods=["POST"])
 def scheduler_preview():
     """次回スケジュール投稿のプレビューを生成する。"""
-    config = load_config()
+    config = peek_config()
     api_keys = config.get("api_keys", {})
     try:
         post_type = logic.select_post_type(config.get("post_type", {}))
@@ -728,7 +1108,7 @@ def scheduler_preview():
             style = logic.select_style_for_type(post_type, writing_styles, config.get("post_type", {}))
             rss_urls = config.get("sources", {}).get("rss_urls", [])
             blacklist = config.get("sources", {}).get("blacklist", [])
-            trends = logic.fetch_trends(rss_urls=rss_urls, blacklist=blacklist) if post_type == "A" else []
+            trends = _fetch_trends_cached(rss_urls, blacklist) if post_type == "A" else []
             trend_summary = trends[0].get("title", "") if trends else "(トレンドなし)"
             return jsonify({
                 "preview": f"[{post_type}] スタイル: {style.get('name', '?')} / トレンド: {trend_summary}",
@@ -749,11 +1129,27 @@ def get_engagement_data():
     """エンゲージメントデータを取得する。"""
     try:
         data = engagement.get_post_history()
-        return jsonify({"data": data})
+        return _stream_json_list("data", data)
     except Exception as e:
         return jsonify({"error": str(e), "data": []}), 200
 
 
+def _stream_json_list(key: str, rows) -> Response:
+    """{key: [...]} 形式の JSON を 1 行ずつ直列化しながら送る。
+
+    全体を一度に文字列化しないため、件数が多くてもメモリ使用量は 1 行分で済む。
+    """
+    def generate():
+        yield b'{"' + key.encode("utf-8") + b'":['
+        sep = b""
+        for row in rows:
+            yield sep + orjson.dumps(row, option=orjson.OPT_NON_STR_KEYS)
+            sep = b","
+        yield b"]}"
+
+    return Response(generate(), mimetype="application/json", direct_passthrough=True)
+
+
 @app.route("/api/engagement/import", methods=["POST"])
 def import_engagement_csv():
     """CSVファイルからエンゲージメントデータをインポートする。"""
@@ -763,9 +1159,8 @@ def import_engagement_csv():
     if not file.filename.endswith(".csv"):
         return jsonify({"error": "CSVファイルのみ対応"}), 400
     try:
-        import tempfile, os
         with tempfile.NamedTemporaryFile(delete=False, suffix=".csv", mode="wb") as tmp:
-            file.save(tmp)
+            shutil.copyfileobj(file.stream, tmp, length=1 << 20)
             tmp_path = tmp.name
         result = engagement.import_csv_auto(tmp_path)
         os.unlink(tmp_path)
@@ -778,15 +1173,16 @@ def import_engagement_csv():
 @app.route("/api/engagement/analyze", methods=["POST"])
 def analyze_engagement():
     """エンゲージメントデータをAIで分析する。"""
-    config = load_config()
+    config = peek_config()
     api_keys = config.get("api_keys", {})
+    force = request.args.get("force", "false") == "true"
     try:
+        # 分析結果のキャッシュ保存は analyze_engagement_trends 側で行う
         analysis = engagement.analyze_engagement_trends(
             api_key=api_keys.get("gemini_api_key", ""),
             model=api_keys.get("gemini_model", "gemini-2.5-flash"),
+            force=force,
         )
-        # 分析結果をキャッシュに保存
-        engagement.save_analysis_cache(analysis)
         return jsonify({"analysis": analysis})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -831,32 +1227,42 @@ def fetch_note_articles():
     """note.com から記事一覧を取得し、キャッシュに保存する。"""
     data = request.get_json() or {}
     note_url = data.get("note_url", "")
+    force = bool(data.get("force", False))
     if not note_url:
         return jsonify({"error": "note URL が指定されていません"}), 400
     try:
-        articles = logic.fetch_note_articles(note_url)
+        articles = _fetch_note_articles_cached(note_url, force=force)
         # キャッシュに保存
-        import json
         cache_path = _PROJECT_ROOT / "note_cache.json"
         cache_data = {"articles": articles, "fetched_at": time.time(), "note_url": note_url}
-        cache_path.write_text(json.dumps(cache_data, ensure_ascii=False, indent=2), encoding="utf-8")
+        cache_path.write_bytes(orjson.dumps(cache_data, option=orjson.OPT_INDENT_2))
+        _note_cache_mem["mtime"] = -1
         return jsonify({"articles": articles})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+# note_cache.json の解析結果（mtime_ns が変わるまで使い回す）
+_note_cache_mem: dict = {"mtime": -1, "data": None}
+
+
 @app.route("/api/note/cache", methods=["GET"])
 def get_note_cache():
     """保存済みのnote記事キャッシュを返す。"""
-    import json
     cache_path = _PROJECT_ROOT / "note_cache.json"
-    if not cache_path.exists():
+    try:
+        mtime = cache_path.stat().st_mtime_ns
+    except FileNotFoundError:
         return jsonify({"articles": []})
+    if mtime == _note_cache_mem["mtime"]:
+        return jsonify(_note_cache_mem["data"])
     try:
-        cache_data = json.loads(cache_path.read_text(encoding="utf-8"))
-        return jsonify(cache_data)
+        cache_data = orjson.loads(cache_path.read_bytes())
     except Exception:
         return jsonify({"articles": []})
+    _note_cache_mem["data"] = cache_data
+    _note_cache_mem["mtime"] = mtime
+    return jsonify(cache_data)
 
 
 # ---------------------------------------------------------------------------
@@ -866,7 +1272,7 @@ def get_note_cache():
 @app.route("/api/persona/generate", methods=["POST"])
 def generate_persona():
     """ペルソナの要素からペルソナテキストを自動生成する。"""
-    config = load_config()
+    config = peek_config()
     persona = config.get("persona", {})
     api_keys = config.get("api_keys", {})
     try:
@@ -891,7 +1297,7 @@ def generate_persona():
 @app.route("/api/persona/suggest-keywords", methods=["POST"])
 def suggest_rss_keywords():
     """ペルソナからRSSキーワードを提案する。"""
-    config = load_config()
+    config = peek_config()
     persona = config.get("persona", {})
     api_keys = config.get("api_keys", {})
     persona_info = persona.get("generated_text", "")
@@ -914,50 +1320,112 @@ def suggest_rss_keywords():
 # ユーティリティ API
 # ---------------------------------------------------------------------------
 
+# ステータスはポーリングされるので、キーの有無だけ短時間キャッシュする
+_STATUS_CACHE_TTL = 2  # 秒
+_status_cache: dict = {"keys": None, "ts": 0.0}
+
+
 @app.route("/api/status", methods=["GET"])
 def api_status():
     """API接続状態を確認する。"""
-    config = load_config()
-    api_keys = config.get("api_keys", {})
-    return jsonify({
-        "gemini": bool(api_keys.get("gemini_api_key")),
-        "x": bool(api_keys.get("x_api_key") and api_keys.get("x_access_token")),
-        "threads": bool(api_keys.get("threads_api_key")),
-        "scheduler": _scheduler_running,
-    })
+    now = time.monotonic()
+    cached = _status_cache.get("keys")
+    if cached is None or now - _status_cache["ts"] >= _STATUS_CACHE_TTL:
+        api_keys = peek_config().get("api_keys", {})
+        cached = {
+            "gemini": bool(api_keys.get("gemini_api_key")),
+            "x": bool(api_keys.get("x_api_key") and api_keys.get("x_access_token")),
+            "threads": bool(api_keys.get("threads_api_key")),
+        }
+        _status_cache["keys"] = cached
+        _status_cache["ts"] = now
+    # スケジューラの状態はキャッシュせず毎回見る
+    return jsonify({**cached, "scheduler": _scheduler_running()})
 
 
 @app.route("/api/logs", methods=["GET"])
 def get_logs():
     """実行ログを取得する。"""
     count = request.args.get("count", 50, type=int)
-    return jsonify({"logs": _execution_logs[-count:]})
+    logs = _recent_logs(count)
+    # 件数が少ないときはストリーミングの分割オーバーヘッドの方が大きい
+    if len(logs) >= 100:
+        return _stream_json_list("logs", logs)
+    return jsonify({"logs": logs})
 
 
 # ---------------------------------------------------------------------------
 # API 接続テスト
 # ---------------------------------------------------------------------------
 
+# 接続テスト結果のキャッシュ: (サービス名, キー値のダイジェスト) → (時刻, ok, メッセージ)
+# キー値そのものはプロセス内に残さない
+_test_cache: dict[tuple[str, str], tuple[float, bool, str]] = {}
+_test_cache_lock = threading.Lock()  # waitress の複数スレッドから同時に触られる
+_TEST_CACHE_TTL = 60  # 秒（成功）
+_TEST_CACHE_FAIL_TTL = 30  # 秒（失敗）
+_X_KEY_NAMES = ("x_api_key", "x_api_secret", "x_access_token", "x_access_token_secret")
+
+
 @app.route("/api/test-connections", methods=["POST"])
 def test_connections():
-    """全API（Gemini / X / Threads）の接続テストを実行する。"""
-    config = load_config()
-    api_keys = config.get("api_keys", {})
-    results = []
+    """全API（Gemini / X / Threads）の接続テストを実行する。
 
-    # Gemini
+    結果はサービスごとに、成功なら 60 秒・失敗なら 30 秒使い回す。?force=1 で必ず再テストする。
+    キャッシュのキーはそのサービスのキー値なので、キーを変更すれば即座に再テストされる。
+    """
+    config = peek_config()
+    api_keys = config.get("api_keys", {})
+    force = request.args.get("force", "") in ("1", "true")
     model = api_keys.get("gemini_model", "gemini-2.5-flash")
-    ok, msg = logic.test_gemini_connection(api_keys.get("gemini_api_key", ""), model)
-    results.append({"service": "gemini", "ok": ok, "message": msg})
-
-    # X
-    ok_x, msg_x = logic.test_x_connection(api_keys)
-    results.append({"service": "x", "ok": ok_x, "message": msg_x})
-
-    # Threads
-    ok_t, msg_t = logic.test_threads_connection(api_keys.get("threads_api_key", ""))
-    results.append({"service": "threads", "ok": ok_t, "message": msg_t})
+    gemini_key = api_keys.get("gemini_api_key", "")
+    threads_key = api_keys.get("threads_api_key", "")
+    def _cache_key(service: str, *parts: str) -> tuple[str, str]:
+        return (service, logic._token_digest("\0".join(parts)))
+
+    tests = [
+        ("gemini", _cache_key("gemini", gemini_key, model),
+         logic.test_gemini_connection, (gemini_key, model)),
+        ("x", _cache_key("x", *(api_keys.get(k, "") for k in _X_KEY_NAMES)),
+         logic.test_x_connection, (api_keys,)),
+        ("threads", _cache_key("threads", threads_key),
+         logic.test_threads_connection, (threads_key,)),
+    ]
 
+    now = time.time()
+    outcomes: dict[str, tuple[bool, str]] = {}
+    futures = {}
+    for service, cache_key, fn, args in tests:
+        if force:
+            cached = None
+        else:
+            with _test_cache_lock:
+                cached = _test_cache.get(cache_key)
+        if cached:
+            ts, ok, msg = cached
+            if now - ts < (_TEST_CACHE_TTL if ok else _TEST_CACHE_FAIL_TTL):
+                outcomes[service] = (ok, msg)
+                continue
+        # テストは独立した通信なので、キャッシュにないものだけ並行して実行する
+        futures[service] = (cache_key, _platform_pool.submit(fn, *args))
+
+    for service, (cache_key, fut) in futures.items():
+        ok, msg = fut.result()
+        outcomes[service] = (ok, msg)
+        with _test_cache_lock:
+            _test_cache[cache_key] = (time.time(), ok, msg)
+    # 古いキーの結果が溜まらないよう、今回使わなかったエントリは捨てる
+    live = {t[1] for t in tests}
+    with _test_cache_lock:
+        for key in [k for k in _test_cache if k not in live]:
+            _test_cache.pop(key, None)
+
+    results = [
+        {"service": service, "ok": outcomes[service][0], "message": outcomes[service][1]}
+        for service, *_ in tests
+    ]
+    if not futures:
+        return jsonify({"results": results, "cached": True})
     return jsonify({"results": results})
 
 
@@ -968,18 +1436,20 @@ def test_connections():
 @app.route("/api/threads/refresh-token", methods=["POST"])
 def refresh_threads_token_api():
     """Threads アクセストークンを長期トークンに更新する。"""
-    config = load_config()
-    api_keys = config.get("api_keys", {})
-    token = api_keys.get("threads_api_key", "")
+    token = peek_config().get("api_keys", {}).get("threads_api_key", "")
     if not token:
         return jsonify({"error": "Threads トークンが未設定です"}), 400
     try:
         result = logic.refresh_threads_token(token)
         new_token = result["access_token"]
-        # 設定を更新
-        api_keys["threads_api_key"] = new_token
-        config.setdefault("schedule", {})["threads_token_issued"] = int(time.time())
-        save_config(config)
+        # 手元のトークンを返しただけ（API 未呼び出し）なら発行時刻を書き換えない。
+        # API が同じ文字列のトークンを返した場合も期限は延びているので書き換える
+        if not result.get("cached"):
+            # 変更は2フィールドだけなので、設定全体を作り直さずに差し替える
+            patch_config({
+                "api_keys": {"threads_api_key": new_token},
+                "schedule": {"threads_token_issued": int(time.time())},
+            })
         expires_days = result.get("expires_in", 0) // 86400
         return jsonify({
             "message": f"✅ トークン更新完了（有効期限: {expires_days}日）",
@@ -996,10 +1466,19 @@ def refresh_threads_token_api():
 # キーワード → RSS URL 変換
 # ---------------------------------------------------------------------------
 
+_KEYWORDS_MAX_BODY = 64 * 1024
+
+
 @app.route("/api/keywords-to-rss", methods=["POST"])
 def keywords_to_rss():
     """キーワードリストを Google News RSS URL に変換する。"""
-    data = request.get_json() or {}
+    # キーワード一覧としてあり得ない大きさのボディはパース前に弾く
+    length = request.content_length
+    if length and length > _KEYWORDS_MAX_BODY:
+        return jsonify({"error": "リクエストが大きすぎます"}), 413
+    if length == 0:
+        return jsonify({"error": "キーワードが指定されていません"}), 400
+    data = request.get_json(silent=True) or {}
     keywords = data.get("keywords", [])
     if not keywords:
         return jsonify({"error": "キーワードが指定されていません"}), 400
@@ -5,11 +5,24 @@ config_manager.py — config.json の読み書きモジュール
 APIキーは base64 難読化して保存する。
 """
 
-import base64
-import json
+import binascii
+import copy
+import os
 import sys
+import threading
 from pathlib import Path
 
+import orjson
+
+try:
+    # SIMD 実装の base64（入っていれば使う。なければ標準の binascii）
+    from pybase64 import b64decode as _b64decode, b64encode as _b64encode
+except ImportError:
+    def _b64encode(data: bytes) -> bytes:
+        return binascii.b2a_base64(data, newline=False)
+
+    _b64decode = binascii.a2b_base64
+
 # PyInstaller --onefile では __file__ が一時展開ディレクトリを指すため、
 # sys.executable（exe本体の場所）を基準にする
 if getattr(sys, 'frozen', False):
@@ -21,27 +34,34 @@ else:
 CONFIG_PATH = _BASE_DIR / "config.json"
 
 # 難読化対象のキー名（model名などは対象外）
-_SECRET_KEYS = {
+_SECRET_KEYS = frozenset({
     "gemini_api_key", "x_api_key", "x_api_secret",
     "x_access_token", "x_access_token_secret", "threads_api_key",
-}
+})
 _OBF_PREFIX = "OBF:"
+_OBF_PREFIX_LEN = len(_OBF_PREFIX)
+
+# load_config のメモ化キャッシュ（config.json の mtime_ns で無効化する）
+_cache: dict = {"mtime": 0, "data": None}
+# Flask は複数スレッドで動くため、キャッシュの確認・更新とファイル書き込みを直列化する。
+# 設定ファイルがない場合は読み込み中に save_config を呼ぶので再入可能なロックにする
+_lock = threading.RLock()
 
 
 def _obfuscate(value: str) -> str:
     """平文を base64 難読化する。空文字列はそのまま返す。"""
-    if not value or value.startswith(_OBF_PREFIX):
+    if not value or value[:_OBF_PREFIX_LEN] == _OBF_PREFIX:
         return value
-    encoded = base64.b64encode(value.encode("utf-8")).decode("ascii")
+    encoded = _b64encode(value.encode("utf-8")).decode("ascii")
     return f"{_OBF_PREFIX}{encoded}"
 
 
 def _deobfuscate(value: str) -> str:
     """難読化済みの値を復号する。OBF: プレフィックスがなければ平文とみなす。"""
-    if not value or not value.startswith(_OBF_PREFIX):
+    if not value or value[:_OBF_PREFIX_LEN] != _OBF_PREFIX:
         return value
     try:
-        return base64.b64decode(value[len(_OBF_PREFIX):]).decode("utf-8")
+        return _b64decode(value[_OBF_PREFIX_LEN:]).decode("utf-8")
     except Exception:
         return value  # 復号失敗時はそのまま返す
 
@@ -337,52 +357,125 @@ def _deep_merge(base: dict, override: dict) -> dict:
     """base の構造を維持しつつ override の値で上書きする。
 
     override に存在しないキーは base の値を保持する。
+    base はその場で書き換えて返すので、使い捨ての dict（get_default_config() の戻り値など）を渡すこと。
     """
-    merged = base.copy()
     for key, value in override.items():
-        if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
-            merged[key] = _deep_merge(merged[key], value)
+        current = base.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            _deep_merge(current, value)
         else:
-            merged[key] = value
-    return merged
+            base[key] = value
+    return base
 
 
-def load_config() -> dict:
-    """設定ファイルを読み込む。存在しなければデフォルトで生成して返す。
+def _load_cached() -> dict:
+    """config.json を解析した dict を返す。mtime が同じなら前回の結果を使い回す。
 
-    APIキーは自動的に復号され、メモリ上では平文として扱う。
+    戻り値はキャッシュそのものなので書き換えてはならない。
     """
-    default = get_default_config()
-    if not CONFIG_PATH.exists():
+    with _lock:
+        return _load_cached_locked()
+
+
+def _load_cached_locked() -> dict:
+    """_load_cached の本体。_lock を保持した状態で呼ぶ。"""
+    try:
+        mtime = os.stat(CONFIG_PATH).st_mtime_ns
+    except FileNotFoundError:
+        default = get_default_config()
         save_config(default)
         return default
 
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    if mtime == _cache["mtime"] and _cache["data"] is not None:
+        return _cache["data"]
 
-    # デフォルトとマージして、新規追加キーを補完
-    merged = _deep_merge(default, data)
+    data = orjson.loads(CONFIG_PATH.read_bytes())
+
+    # デフォルトとマージして、新規追加キーを補完（新しく生成したデフォルトに直接書き込む）
+    merged = _deep_merge(get_default_config(), data)
 
     # APIキーを復号
     api = merged.get("api_keys", {})
-    for key in _SECRET_KEYS:
-        if key in api:
-            api[key] = _deobfuscate(api[key])
+    # 既存キーへの代入だけなのでサイズは変わらず、走査しながら書き換えてよい
+    for key, value in api.items():
+        if key in _SECRET_KEYS:
+            api[key] = _deobfuscate(value)
 
+    _cache["mtime"] = mtime
+    _cache["data"] = merged
     return merged
 
 
+def load_config() -> dict:
+    """設定ファイルを読み込む。存在しなければデフォルトで生成して返す。
+
+    APIキーは自動的に復号され、メモリ上では平文として扱う。
+    戻り値は呼び出し側で自由に書き換えられるコピー。
+    """
+    return copy.deepcopy(_load_cached())
+
+
+def peek_config() -> dict:
+    """読み取り専用で設定を返す。
+
+    load_config と同じ内容だが、コピーせずキャッシュ済みの dict を共有する。
+    書き換える場合は load_config を使うこと。
+    """
+    return _load_cached()
+
+
 def save_config(data: dict) -> None:
     """設定を config.json に書き出す。APIキーは難読化して保存する。"""
-    # 元データを改変しないよう深いコピーを作成
-    import copy
-    to_save = copy.deepcopy(data)
-
-    # APIキーを難読化
-    api = to_save.get("api_keys", {})
-    for key in _SECRET_KEYS:
-        if key in api:
-            api[key] = _obfuscate(api[key])
-
-    with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-        json.dump(to_save, f, ensure_ascii=False, indent=2)
+    # 元データを改変しないよう、書き換える api_keys だけを作り直した浅いコピーにする
+    to_save = dict(data)
+    if "api_keys" in data:
+        # APIキーを難読化
+        to_save["api_keys"] = {
+            k: (_obfuscate(v) if k in _SECRET_KEYS else v)
+            for k, v in data["api_keys"].items()
+        }
+
+    with _lock:
+        _write_locked(to_save)
+
+
+def patch_config(updates: dict[str, dict]) -> None:
+    """config.json の一部のフィールドだけを書き換える。
+
+    updates は {セクション名: {キー: 値}} の形で渡す。
+    ファイルの中身をそのまま読み、指定されたキーだけを差し替えて書き戻すため、
+    デフォルトとのマージや全APIキーの復号・再難読化を行わない。
+    """
+    with _lock:
+        try:
+            raw = orjson.loads(CONFIG_PATH.read_bytes())
+        except FileNotFoundError:
+            raw = get_default_config()
+
+        for section, fields in updates.items():
+            target = raw.get(section)
+            if not isinstance(target, dict):
+                target = raw[section] = {}
+            if section == "api_keys":
+                fields = {
+                    k: (_obfuscate(v) if k in _SECRET_KEYS else v)
+                    for k, v in fields.items()
+                }
+            target.update(fields)
+
+        _write_locked(raw)
+
+
+def _write_locked(data: dict) -> None:
+    """保存用の dict を config.json に書き出す。_lock を保持した状態で呼ぶ。"""
+    # 一時ファイルへ一括で書いてから置き換える。書き込み途中で落ちても
+    # config.json が壊れた状態で残らない
+    tmp_path = CONFIG_PATH.with_suffix(".json.tmp")
+    tmp_path.write_bytes(
+        orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    )
+    os.replace(tmp_path, CONFIG_PATH)
+
+    # 次回の load_config で必ず再読込させる
+    _cache["mtime"] = 0
+    _cache["data"] = None
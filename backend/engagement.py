@@ -2,19 +2,28 @@
 engagement.py — 投稿履歴の記録 & Xアナリティクス CSV インポート & AI分析
 
 Phase 3: フィードバックループ（無料版）
-- 投稿結果を post_history.json に保存
+- 投稿結果を post_history.ndjson に保存（1行1件の追記型）
 - Xアナリティクスの CSV をインポートしてエンゲージメントを取得（$0）
 - Gemini でエンゲージメント傾向を分析し、次回生成に活用
 """
 
 from __future__ import annotations
 
+import bisect
 import csv
-import json
+import hashlib
+import heapq
+import io
+import os
+import re
 import sys
+import threading
 import time
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
+
+import orjson
 
 # ---------------------------------------------------------------------------
 # 投稿履歴の保存先（exe 対応: config_manager.py と同じパターン）
@@ -25,7 +34,9 @@ if getattr(sys, 'frozen', False):
 else:
     _BASE_DIR = Path(__file__).resolve().parent
 
-_HISTORY_FILE = _BASE_DIR / "post_history.json"
+_HISTORY_FILE = _BASE_DIR / "post_history.ndjson"
+# 旧形式（JSON 配列）の履歴。見つかれば初回読み込み時に NDJSON へ移行する
+_LEGACY_HISTORY_FILE = _BASE_DIR / "post_history.json"
 _DAILY_OVERVIEW_FILE = _BASE_DIR / "daily_overview.json"
 _ANALYSIS_CACHE_FILE = _BASE_DIR / "analysis_cache.json"
 _INBOX_DIR = _BASE_DIR / "INBOX"
@@ -33,33 +44,131 @@ _INBOX_DIR = _BASE_DIR / "INBOX"
 # INBOX フォルダがなければ自動生成
 _INBOX_DIR.mkdir(exist_ok=True)
 
+# 履歴の保持件数。追記で _HISTORY_COMPACT_AT 件を超えたら _MAX_HISTORY 件に詰め直す。
+# ファイルにはそれまで最大 _HISTORY_COMPACT_AT 行残るが、読み出し側には直近 _MAX_HISTORY 件だけを見せる
+_MAX_HISTORY = 500
+_HISTORY_COMPACT_AT = 600
 
-def _load_history() -> list[dict]:
-    """履歴ファイルを読み込む。"""
-    if _HISTORY_FILE.exists():
-        try:
-            return json.loads(_HISTORY_FILE.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError):
+# 投稿（追記）・CSV取り込み（全体書き換え）・移行を直列化する
+_history_lock = threading.RLock()
+
+
+# 読み込み済みデータのメモリキャッシュ（ファイルの (mtime_ns, size) で無効化する）
+# 履歴の "data" は直近 _MAX_HISTORY 件、"lines" はファイル上の件数（詰め直しの判定用）
+_history_cache: dict = {"version": None, "data": [], "lines": 0}
+_daily_cache: dict = {"version": None, "data": []}
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """一時ファイルに書いてから置き換える。書き込み途中で落ちても元のファイルは壊れない。"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _file_version(path: Path) -> tuple[int, int] | None:
+    """ファイルの (mtime_ns, size) を返す。ファイルがなければ None。"""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load_json_list_cached(path: Path, cache: dict) -> list[dict]:
+    """JSON 配列ファイルを読み込む。ファイルが変わっていなければキャッシュを返す。
+
+    戻り値はキャッシュと共有しているため、呼び出し側で書き換えないこと。
+    """
+    version = _file_version(path)
+    if version is None:
+        return []
+    if version == cache["version"]:
+        return cache["data"]
+    try:
+        data = orjson.loads(path.read_bytes())
+    except (orjson.JSONDecodeError, OSError):
+        return []
+    cache["version"] = version
+    cache["data"] = data
+    return data
+
+
+def _history_ref() -> list[dict]:
+    """直近 _MAX_HISTORY 件の履歴を読み取り専用で返す（キャッシュと共有、書き換え禁止）。"""
+    version = _file_version(_HISTORY_FILE)
+    if version is None:
+        if not _LEGACY_HISTORY_FILE.exists():
             return []
-    return []
+        _migrate_legacy_history()
+        version = _file_version(_HISTORY_FILE)
+    if version == _history_cache["version"]:
+        return _history_cache["data"]
+    try:
+        raw = _HISTORY_FILE.read_bytes()
+    except OSError:
+        return []
+    data = []
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        try:
+            data.append(orjson.loads(line))
+        except orjson.JSONDecodeError:
+            continue  # 書き込み途中で落ちた行などは読み飛ばす
+    _history_cache["version"] = version
+    _history_cache["lines"] = len(data)
+    if len(data) > _MAX_HISTORY:
+        data = data[-_MAX_HISTORY:]
+    _history_cache["data"] = data
+    return data
+
+
+def _migrate_legacy_history() -> None:
+    """旧形式の post_history.json を NDJSON に書き換え、元ファイルは .bak に退避する。"""
+    with _history_lock:
+        if _HISTORY_FILE.exists():
+            return
+        try:
+            history = orjson.loads(_LEGACY_HISTORY_FILE.read_bytes())
+        except (orjson.JSONDecodeError, OSError):
+            return
+        if not isinstance(history, list):
+            return
+        _save_history(history)
+        _LEGACY_HISTORY_FILE.replace(_LEGACY_HISTORY_FILE.with_suffix(".json.bak"))
 
 
-def get_post_history() -> list[dict]:
-    """公開API用: 投稿履歴を返す。"""
-    return _load_history()
+def _load_history() -> list[dict]:
+    """履歴ファイルを読み込む。
+
+    リスト自体はコピーなので追加・削除は自由だが、
+    要素の dict はキャッシュと共有しているので書き換える場合は差し替えること。
+    """
+    return list(_history_ref())
+
+
+def history_version() -> tuple[int, int] | None:
+    """履歴ファイルの (mtime_ns, size) を返す。キャッシュの無効化判定用。
+
+    ファイルがなければ None。
+    """
+    return _file_version(_HISTORY_FILE)
 
 
 def _save_history(history: list[dict]) -> None:
-    """履歴ファイルに書き込む。"""
-    _HISTORY_FILE.write_text(
-        json.dumps(history, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    """履歴ファイル全体を書き直す（1行1件）。"""
+    _atomic_write_bytes(_HISTORY_FILE, b"".join(orjson.dumps(h) + b"\n" for h in history))
+    # 書いた内容でキャッシュを更新し、次回の読み込みで再パースしない。
+    # 渡されたリストはそのままキャッシュになるので、呼び出し側は以後書き換えないこと
+    _history_cache["version"] = _file_version(_HISTORY_FILE)
+    _history_cache["lines"] = len(history)
+    _history_cache["data"] = history[-_MAX_HISTORY:] if len(history) > _MAX_HISTORY else history
 
 
 def get_post_history() -> list[dict]:
     """投稿履歴を取得する（UI表示用、新しい順）。"""
-    return list(reversed(_load_history()))
+    return list(reversed(_history_ref()))
 
 
 # ---------------------------------------------------------------------------
@@ -89,14 +198,28 @@ def record_post(
         "engagement": None,
     }
 
-    history = _load_history()
-    history.append(entry)
-
-    # 最大500件に制限
-    if len(history) > 500:
-        history = history[-500:]
-
-    _save_history(history)
+    with _history_lock:
+        history = _history_ref()
+        if history is not _history_cache["data"]:
+            history = []  # ファイルがまだなかった
+            _history_cache["lines"] = 0
+        if _history_cache["lines"] >= _HISTORY_COMPACT_AT:
+            # ファイルが上限を超えるときだけ直近 _MAX_HISTORY 件に詰めて書き直す
+            _save_history(history[-(_MAX_HISTORY - 1):] + [entry])
+            return entry
+
+        # 通常は1行追記するだけで、ファイル全体は書き直さない
+        with open(_HISTORY_FILE, "ab") as f:
+            f.write(orjson.dumps(entry) + b"\n")
+        # キャッシュ済みのリストへその場で追加し、投稿のたびにリストを複製しない
+        # （書き込みは _history_lock 下のこのモジュールだけが行う）。
+        # _MAX_HISTORY 件を超えたら先頭を落とした新しいリストにする（索引も作り直される）
+        history.append(entry)
+        if len(history) > _MAX_HISTORY:
+            history = history[-_MAX_HISTORY:]
+        _history_cache["version"] = _file_version(_HISTORY_FILE)
+        _history_cache["lines"] += 1
+        _history_cache["data"] = history
     return entry
 
 
@@ -104,23 +227,50 @@ def record_post(
 # 重複防止ヘルパー
 # ---------------------------------------------------------------------------
 
+# アプリから投稿した分だけの索引。履歴キャッシュのリストに追記されたら差分だけ取り込む
+_app_index: dict = {"data": None, "n": 0, "epochs": [], "entries": []}
+
+
+def _app_posts_by_epoch() -> tuple[list[int], list[dict]]:
+    """アプリから投稿した分を時系列順に (epoch のリスト, エントリのリスト) で返す。
+
+    アプリの投稿は追記順 = 時系列順なので epoch のリストは bisect で引ける。
+    CSV 取り込み分（epoch=0）は含めない。戻り値は書き換えないこと。
+    """
+    with _history_lock:
+        history = _history_ref()
+        idx = _app_index
+        if idx["data"] is not history or idx["n"] > len(history):
+            idx.update(data=history, n=0, epochs=[], entries=[])
+        for h in islice(history, idx["n"], None):
+            if h.get("source") == "app":
+                idx["epochs"].append(h.get("epoch", 0))
+                idx["entries"].append(h)
+        idx["n"] = len(history)
+        return idx["epochs"], idx["entries"]
+
+
+# 空白区切りで "note.com/" を含む語（旧実装の text.split() と同じ単位）
+_NOTE_URL_WORD_RE = re.compile(r"\S*note\.com/\S*")
+
+
 def get_recent_note_urls(days: int = 3) -> set[str]:
     """直近 N 日間に投稿した note 記事の URL を返す。"""
     cutoff = int(time.time()) - days * 86400
     urls: set[str] = set()
-    for entry in _load_history():
-        if entry.get("epoch", 0) >= cutoff:
-            text = entry.get("text", "")
-            # note.com の URL を抽出
-            for word in text.split():
-                if "note.com/" in word:
-                    urls.add(word.strip("()[]「」"))
+    epochs, app_posts = _app_posts_by_epoch()
+    for entry in app_posts[bisect.bisect_left(epochs, cutoff):]:
+        # note.com の URL を含む語を抽出
+        urls.update(
+            m.group(0).strip("()[]「」")
+            for m in _NOTE_URL_WORD_RE.finditer(entry.get("text", ""))
+        )
     return urls
 
 
 def get_recent_styles(count: int = 10) -> list[str]:
     """直近 N 件の投稿で使用されたスタイル名を返す。"""
-    history = _load_history()
+    history = _history_ref()
     return [
         e.get("style", "") for e in history[-count:]
         if e.get("source") == "app" and e.get("style")
@@ -131,21 +281,18 @@ def get_recent_styles(count: int = 10) -> list[str]:
 # ---------------------------------------------------------------------------
 
 def _load_daily_overview() -> list[dict]:
-    """日次オーバービューデータを読み込む。"""
-    if _DAILY_OVERVIEW_FILE.exists():
-        try:
-            return json.loads(_DAILY_OVERVIEW_FILE.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError):
-            return []
-    return []
+    """日次オーバービューデータを読み込む。
+
+    戻り値はキャッシュと共有しているため、呼び出し側で書き換えないこと。
+    """
+    return _load_json_list_cached(_DAILY_OVERVIEW_FILE, _daily_cache)
 
 
 def _save_daily_overview(data: list[dict]) -> None:
     """日次オーバービューデータを書き込む。"""
-    _DAILY_OVERVIEW_FILE.write_text(
-        json.dumps(data, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    _atomic_write_bytes(_DAILY_OVERVIEW_FILE, orjson.dumps(data))
+    _daily_cache["version"] = _file_version(_DAILY_OVERVIEW_FILE)
+    _daily_cache["data"] = list(data)
 
 
 def get_daily_overview() -> list[dict]:
@@ -159,12 +306,90 @@ def get_daily_overview() -> list[dict]:
 
 def _parse_int(val: str) -> int:
     """CSV 値を安全に int に変換する。"""
+    if not val:
+        return 0
+    # ほとんどの値は区切りなしの数字なので、strip / replace を省く
+    # （isdigit は上付き数字なども真になるため、int() が受け付ける isdecimal で見る）
+    if val.isdecimal():
+        return int(val)
     try:
         return int(val.strip().replace(",", ""))
     except (ValueError, AttributeError):
         return 0
 
 
+# X アナリティクスの CSV は BOM 付き UTF-8 が基本。古い Excel 保存分のために SJIS 系も試す
+# （utf-8-sig は BOM なしの UTF-8 もそのまま読める）
+_CSV_ENCODINGS = ("utf-8-sig", "cp932", "shift_jis")
+
+
+def _decode_csv_bytes(data: bytes) -> str | None:
+    """CSV のバイト列を文字列にする。どのエンコーディングでも読めなければ None。"""
+    for enc in _CSV_ENCODINGS:
+        try:
+            return data.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+# (出力キー, CSV のヘッダー名)。出力 dict はこの順でキーを持つ
+_CONTENT_METRIC_COLS = (
+    ("impressions", "インプレッション数"),
+    ("likes", "いいね"),
+    ("engagement", "エンゲージメント"),
+    ("bookmarks", "ブックマーク"),
+    ("shares", "共有された回数"),
+    ("follows", "新しいフォロー"),
+    ("replies", "返信"),
+    ("retweets", "リポスト"),
+    ("profile_clicks", "プロフィールへのアクセス数"),
+    ("detail_clicks", "詳細のクリック数"),
+    ("url_clicks", "URLのクリック数"),
+)
+_OVERVIEW_METRIC_COLS = (
+    ("impressions", "インプレッション数"),
+    ("likes", "いいね"),
+    ("engagement", "エンゲージメント"),
+    ("bookmarks", "ブックマーク"),
+    ("shares", "共有された回数\\"),
+    ("new_follows", "新しいフォロー"),
+    ("unfollows", "フォロー解除"),
+    ("replies", "返信"),
+    ("retweets", "リポスト"),
+    ("profile_visits", "プロフィールへのアクセス数"),
+    ("posts_created", "ポストを作成"),
+    ("video_views", "動画再生数"),
+    ("media_views", "メディアの再生数"),
+)
+
+
+def _read_csv(csv_path: Path) -> tuple[dict[str, int], Iterator[list[str]]]:
+    """CSV を読み込み、(ヘッダー名 → 列番号, 残りの行のイテレータ) を返す。
+
+    デコードは一度だけ行い、行はそのまま流し読みする。
+    ヘッダー行すら読めない場合は ValueError。
+    """
+    text = _decode_csv_bytes(csv_path.read_bytes())
+    reader = csv.reader(io.StringIO(text or "", newline=""))
+    headers = next(reader, None)
+    if not headers:
+        raise ValueError(f"CSVの読み込みに失敗しました: {csv_path}")
+    return _column_index(headers), reader
+
+
+def _column_index(headers: list[str]) -> dict[str, int]:
+    """ヘッダー名 → 列番号の対応表を作る（重複時は DictReader と同じく後勝ち）。"""
+    return {name: i for i, name in enumerate(headers)}
+
+
+def _cell(row: list[str], index: int | None, default: str = "0") -> str:
+    """行から列番号の値を取り出す。列がない・行が短い場合は default。"""
+    if index is None or index >= len(row):
+        return default
+    return row[index]
+
+
 def detect_csv_type(csv_path: str | Path) -> str:
     """CSVファイルの種類を自動判定する。
 
@@ -174,16 +399,17 @@ def detect_csv_type(csv_path: str | Path) -> str:
         "unknown"  = 判定不能
     """
     csv_path = Path(csv_path)
-    for enc in ("utf-8-sig", "utf-8", "cp932", "shift_jis"):
-        try:
-            with open(csv_path, encoding=enc, newline="") as f:
-                reader = csv.DictReader(f)
-                headers = reader.fieldnames or []
-            break
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-    else:
+    # 判定にはヘッダー行だけあればよいので先頭だけ読む。
+    # 途中で切れたマルチバイト文字で誤判定しないよう、最後の改行までに揃える
+    with open(csv_path, "rb") as f:
+        head = f.read(8192)
+    cut = head.rfind(b"\n")
+    if cut >= 0:
+        head = head[:cut]
+    text = _decode_csv_bytes(head)
+    if text is None:
         return "unknown"
+    headers = next(csv.reader(io.StringIO(text, newline="")), [])
 
     if "ポストID" in headers:
         return "content"
@@ -209,83 +435,88 @@ def import_csv(csv_path: str | Path | None = None) -> dict[str, int]:
             )
     csv_path = Path(csv_path)
 
-    # CSV 読み込み（BOM 対応）
-    rows = []
-    for enc in ("utf-8-sig", "utf-8", "cp932", "shift_jis"):
-        try:
-            with open(csv_path, encoding=enc, newline="") as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-            break
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-
-    if not rows:
-        raise ValueError(f"CSVの読み込みに失敗しました: {csv_path}")
+    col, reader = _read_csv(csv_path)
+
+    with _history_lock:
+        history = _load_history()
+        # post_id → history 内の位置
+        id_index = {h["post_id"]: i for i, h in enumerate(history) if h.get("post_id")}
+        metric_cols = [(key, col.get(name)) for key, name in _CONTENT_METRIC_COLS]
+        i_post_id = col.get("ポストID")
+        i_text = col.get("ポスト本文")
+        i_date = col.get("日付")
+
+        imported = 0
+        updated = 0
+        skipped = 0
+
+        for row in reader:
+            if not row:
+                continue  # 空行は DictReader と同様に読み飛ばす
+            post_id = _cell(row, i_post_id, "").strip()
+            if not post_id or post_id == "":
+                skipped += 1
+                continue
+
+            engagement = {
+                key: _parse_int(_cell(row, i)) for key, i in metric_cols
+            }
 
-    history = _load_history()
-    existing_ids = {h.get("post_id") for h in history if h.get("post_id")}
+            # 既存エントリの更新
+            pos = id_index.get(post_id)
+            if pos is not None:
+                # 要素はキャッシュと共有しているので、書き換えずに差し替える
+                history[pos] = {
+                    **history[pos],
+                    "engagement": engagement,
+                    "engagement_updated": int(time.time()),
+                }
+                updated += 1
+            else:
+                # 新規エントリ
+                text = _cell(row, i_text, "").strip()
+                date_str = _cell(row, i_date, "").strip()
+
+                entry = {
+                    "timestamp": date_str,
+                    "epoch": 0,
+                    "platform": "x",
+                    "post_id": post_id,
+                    "text": text,
+                    "char_count": len(text),
+                    "style": "",
+                    "trend": "",
+                    "smart_analysis": False,
+                    "source": "csv_import",
+                    "engagement": engagement,
+                    "engagement_updated": int(time.time()),
+                }
+                id_index[post_id] = len(history)
+                history.append(entry)
+                imported += 1
+
+        if not (imported or updated or skipped):
+            raise ValueError(f"CSVの読み込みに失敗しました: {csv_path}")
+
+        # 最大件数に制限（手元のコピーなので先頭をその場で削る）
+        if len(history) > _MAX_HISTORY:
+            del history[:-_MAX_HISTORY]
+
+        _save_history(history)
+    return {"imported": imported, "updated": updated, "skipped": skipped}
 
-    imported = 0
-    updated = 0
-    skipped = 0
 
-    for row in rows:
-        post_id = row.get("ポストID", "").strip()
-        if not post_id or post_id == "":
-            skipped += 1
-            continue
+_MAX_DAILY_OVERVIEW = 365
 
-        engagement = {
-            "impressions": _parse_int(row.get("インプレッション数", "0")),
-            "likes": _parse_int(row.get("いいね", "0")),
-            "engagement": _parse_int(row.get("エンゲージメント", "0")),
-            "bookmarks": _parse_int(row.get("ブックマーク", "0")),
-            "shares": _parse_int(row.get("共有された回数", "0")),
-            "follows": _parse_int(row.get("新しいフォロー", "0")),
-            "replies": _parse_int(row.get("返信", "0")),
-            "retweets": _parse_int(row.get("リポスト", "0")),
-            "profile_clicks": _parse_int(row.get("プロフィールへのアクセス数", "0")),
-            "detail_clicks": _parse_int(row.get("詳細のクリック数", "0")),
-            "url_clicks": _parse_int(row.get("URLのクリック数", "0")),
-        }
 
-        # 既存エントリの更新
-        if post_id in existing_ids:
-            for h in history:
-                if h.get("post_id") == post_id:
-                    h["engagement"] = engagement
-                    h["engagement_updated"] = int(time.time())
-                    updated += 1
-                    break
-        else:
-            # 新規エントリ
-            text = row.get("ポスト本文", "").strip()
-            date_str = row.get("日付", "").strip()
-
-            entry = {
-                "timestamp": date_str,
-                "epoch": 0,
-                "platform": "x",
-                "post_id": post_id,
-                "text": text,
-                "char_count": len(text),
-                "style": "",
-                "trend": "",
-                "smart_analysis": False,
-                "source": "csv_import",
-                "engagement": engagement,
-                "engagement_updated": int(time.time()),
-            }
-            history.append(entry)
-            imported += 1
+def _date_key(d: dict) -> str:
+    """ソート用: 日次データの日付。"""
+    return d.get("date", "")
 
-    # 最大500件に制限
-    if len(history) > 500:
-        history = history[-500:]
 
-    _save_history(history)
-    return {"imported": imported, "updated": updated, "skipped": skipped}
+def _is_sorted_desc(items: list[dict], key: Callable[[dict], str]) -> bool:
+    """items が key の降順に並んでいるか。"""
+    return all(key(a) >= key(b) for a, b in zip(items, islice(items, 1, None)))
 
 
 def import_daily_overview_csv(csv_path: str | Path) -> dict[str, int]:
@@ -299,69 +530,60 @@ def import_daily_overview_csv(csv_path: str | Path) -> dict[str, int]:
     """
     csv_path = Path(csv_path)
 
-    # CSV 読み込み（BOM 対応）
-    rows = []
-    for enc in ("utf-8-sig", "utf-8", "cp932", "shift_jis"):
-        try:
-            with open(csv_path, encoding=enc, newline="") as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-            break
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-
-    if not rows:
-        raise ValueError(f"CSVの読み込みに失敗しました: {csv_path}")
+    col, reader = _read_csv(csv_path)
 
-    existing = _load_daily_overview()
-    existing_dates = {d.get("date") for d in existing}
+    existing = list(_load_daily_overview())
+    # date → existing 内の位置
+    date_index = {d.get("date"): i for i, d in enumerate(existing)}
+    # 既存にない日付の行（date → エントリ）。既存分とは別に持ち、最後にマージする
+    new_entries: dict[str, dict] = {}
+    metric_cols = [(key, col.get(name)) for key, name in _OVERVIEW_METRIC_COLS]
+    i_date = col.get("Date")
 
     imported = 0
     updated = 0
     skipped = 0
 
-    for row in rows:
-        date_str = row.get("Date", "").strip()
+    for row in reader:
+        if not row:
+            continue
+        date_str = _cell(row, i_date, "").strip()
         if not date_str:
             skipped += 1
             continue
 
         entry = {
             "date": date_str,
-            "impressions": _parse_int(row.get("インプレッション数", "0")),
-            "likes": _parse_int(row.get("いいね", "0")),
-            "engagement": _parse_int(row.get("エンゲージメント", "0")),
-            "bookmarks": _parse_int(row.get("ブックマーク", "0")),
-            "shares": _parse_int(row.get("共有された回数\\", "0")),
-            "new_follows": _parse_int(row.get("新しいフォロー", "0")),
-            "unfollows": _parse_int(row.get("フォロー解除", "0")),
-            "replies": _parse_int(row.get("返信", "0")),
-            "retweets": _parse_int(row.get("リポスト", "0")),
-            "profile_visits": _parse_int(row.get("プロフィールへのアクセス数", "0")),
-            "posts_created": _parse_int(row.get("ポストを作成", "0")),
-            "video_views": _parse_int(row.get("動画再生数", "0")),
-            "media_views": _parse_int(row.get("メディアの再生数", "0")),
+            **{key: _parse_int(_cell(row, i)) for key, i in metric_cols},
             "imported_at": int(time.time()),
         }
 
-        if date_str in existing_dates:
-            for d in existing:
-                if d.get("date") == date_str:
-                    d.update(entry)
-                    updated += 1
-                    break
+        pos = date_index.get(date_str)
+        if pos is not None:
+            # 日付は変わらないので並び順もそのまま
+            existing[pos] = {**existing[pos], **entry}
+            updated += 1
+        elif date_str in new_entries:
+            new_entries[date_str] = entry
+            updated += 1
         else:
-            existing.append(entry)
+            new_entries[date_str] = entry
             imported += 1
 
-    # 日付順にソート（新しい順）
-    existing.sort(key=lambda x: x.get("date", ""), reverse=True)
-
-    # 最大365日分に制限
-    if len(existing) > 365:
-        existing = existing[:365]
+    if not (imported or updated or skipped):
+        raise ValueError(f"CSVの読み込みに失敗しました: {csv_path}")
 
-    _save_daily_overview(existing)
+    # 日付順（新しい順）に並べ、最大365日分に制限する。
+    # 保存済みデータは新しい順に並んでいるので、新規分だけソートしてマージする
+    if not _is_sorted_desc(existing, _date_key):
+        existing.sort(key=_date_key, reverse=True)  # 手で編集された場合など
+    added = sorted(new_entries.values(), key=_date_key, reverse=True)
+    merged = list(islice(
+        heapq.merge(added, existing, key=_date_key, reverse=True),
+        _MAX_DAILY_OVERVIEW,
+    ))
+
+    _save_daily_overview(merged)
     return {"imported": imported, "updated": updated, "skipped": skipped}
 
 
@@ -390,16 +612,15 @@ def _find_latest_csv() -> Path | None:
     if not _INBOX_DIR.exists():
         return None
 
-    csvs = sorted(
-        _INBOX_DIR.glob("*.csv"),
-        key=lambda p: p.stat().st_mtime,
-        reverse=True,
-    )
+    # DirEntry は stat 結果を保持するので、ソートのたびに stat し直さない
+    with os.scandir(_INBOX_DIR) as it:
+        csvs = [e for e in it if e.name.lower().endswith(".csv") and e.is_file()]
+    csvs.sort(key=lambda e: e.stat().st_mtime, reverse=True)
     # account_overview は除外（content の方を使う）
     for c in csvs:
         if "overview" not in c.name.lower():
-            return c
-    return csvs[0] if csvs else None
+            return Path(c.path)
+    return Path(csvs[0].path) if csvs else None
 
 
 # ---------------------------------------------------------------------------
@@ -429,16 +650,33 @@ _ANALYSIS_PROMPT = """\
 """
 
 
+def _analysis_source_hash(model: str) -> str:
+    """分析の入力（履歴・日次データのファイル状態とモデル名）を表すハッシュ。"""
+    key = f"{history_version()}:{_file_version(_DAILY_OVERVIEW_FILE)}:{model}"
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
 def analyze_engagement_trends(
     api_key: str,
     model: str = "gemini-2.5-flash",
+    force: bool = False,
 ) -> str:
-    """過去の投稿のエンゲージメント傾向をGeminiで分析する。"""
+    """過去の投稿のエンゲージメント傾向をGeminiで分析する。
+
+    結果は分析キャッシュに保存する。前回の分析から履歴・日次データが
+    変わっていなければ、force=True でない限り Gemini を呼ばずに前回の結果を返す。
+    """
+    source_hash = _analysis_source_hash(model)
+    if not force:
+        cached = load_analysis_cache()
+        if cached.get("hash") == source_hash and cached.get("analysis"):
+            return cached["analysis"]
+
     from google import genai
     from google.genai import errors as genai_errors
     from google.genai.types import GenerateContentConfig
 
-    history = _load_history()
+    history = _history_ref()
 
     with_engagement = [
         h for h in history
@@ -446,9 +684,11 @@ def analyze_engagement_trends(
     ]
 
     if len(with_engagement) < 3:
-        return ("📊 分析に必要なデータが不足しています。\n"
-                f"エンゲージメント取得済み: {len(with_engagement)}件 / 最低3件必要\n"
-                "XアナリティクスからCSVをダウンロードし、INBOXフォルダに入れてください。")
+        message = ("📊 分析に必要なデータが不足しています。\n"
+                   f"エンゲージメント取得済み: {len(with_engagement)}件 / 最低3件必要\n"
+                   "XアナリティクスからCSVをダウンロードし、INBOXフォルダに入れてください。")
+        save_analysis_cache(message, source_hash)
+        return message
 
     # 直近30件を整形
     post_summaries = []
@@ -512,32 +752,35 @@ def analyze_engagement_trends(
         else:
             raise
 
-    return response.text.strip()
+    analysis = response.text.strip()
+    save_analysis_cache(analysis, source_hash)
+    return analysis
 
 
 def get_history_summary() -> dict[str, Any]:
     """投稿履歴のサマリーを返す（日次オーバービュー含む）。"""
-    history = _load_history()
+    history = _history_ref()
 
     total = len(history)
-    with_eng = [h for h in history if h.get("engagement") is not None]
-    count = len(with_eng)
 
+    # 合計・件数・ベストいいねを1回の走査でまとめて求める
+    count = 0
     total_likes = 0
     total_rt = 0
     total_imp = 0
-    for h in with_eng:
-        eng = h["engagement"]
-        total_likes += eng.get("likes", 0)
+    best_likes = 0
+    for h in history:
+        eng = h.get("engagement")
+        if eng is None:
+            continue
+        count += 1
+        likes = eng.get("likes", 0)
+        total_likes += likes
+        if likes > best_likes:
+            best_likes = likes
         total_rt += eng.get("retweets", 0)
         total_imp += eng.get("impressions", 0)
 
-    # ベストいいね
-    best_likes = max(
-        (h.get("engagement", {}).get("likes", 0) for h in with_eng),
-        default=0,
-    )
-
     result: dict[str, Any] = {
         "total_posts": total,
         "with_engagement": count,
@@ -550,31 +793,46 @@ def get_history_summary() -> dict[str, Any]:
     # 日次オーバービューのサマリーも追加
     daily = _load_daily_overview()
     if daily:
-        total_daily_imp = sum(d.get("impressions", 0) for d in daily)
-        total_new_follows = sum(d.get("new_follows", 0) for d in daily)
-        total_unfollows = sum(d.get("unfollows", 0) for d in daily)
+        total_daily_imp = 0
+        total_new_follows = 0
+        total_unfollows = 0
+        best_day = daily[0]
+        best_day_imp = best_day.get("impressions", 0)
+        for d in daily:
+            imp = d.get("impressions", 0)
+            total_daily_imp += imp
+            total_new_follows += d.get("new_follows", 0)
+            total_unfollows += d.get("unfollows", 0)
+            # max() と同じく、同値なら先に出てきた日を残す
+            if imp > best_day_imp:
+                best_day, best_day_imp = d, imp
         days = len(daily)
         result["daily_overview"] = {
             "days": days,
             "total_impressions": total_daily_imp,
-            "avg_daily_impressions": round(total_daily_imp / days) if days else 0,
+            "avg_daily_impressions": round(total_daily_imp / days),
             "total_new_follows": total_new_follows,
             "total_unfollows": total_unfollows,
             "net_follow_change": total_new_follows - total_unfollows,
-            "best_day": max(daily, key=lambda d: d.get("impressions", 0)).get("date", "") if daily else "",
-            "best_day_impressions": max(d.get("impressions", 0) for d in daily) if daily else 0,
+            "best_day": best_day.get("date", ""),
+            "best_day_impressions": best_day_imp,
         }
 
     return result
 
 
+def _likes_key(h: dict) -> int:
+    """ソート用: engagement 取得済みのエントリのいいね数。"""
+    return h["engagement"].get("likes", 0)
+
+
 def get_feedback_for_prompt() -> str:
     """過去のエンゲージメントデータから、投稿生成プロンプトに
     組み込むためのフィードバック文を生成する。
 
     データが不足している場合は空文字を返す（プロンプトへの影響なし）。
     """
-    history = _load_history()
+    history = _history_ref()
     with_eng = [
         h for h in history
         if h.get("engagement") is not None
@@ -584,15 +842,10 @@ def get_feedback_for_prompt() -> str:
     if len(with_eng) < 5:
         return ""
 
-    # いいね数でソート → 上位・下位を抽出
-    sorted_by_likes = sorted(
-        with_eng,
-        key=lambda h: h.get("engagement", {}).get("likes", 0),
-        reverse=True,
-    )
-
-    top_posts = sorted_by_likes[:3]
-    low_posts = [p for p in sorted_by_likes[-3:] if p.get("engagement", {}).get("likes", 0) == 0]
+    # いいね数で上位・下位を抽出（全体をソートせず、必要な分だけ取る）
+    top_posts = heapq.nlargest(3, with_eng, key=_likes_key)
+    # いいね0件の投稿のうち、降順ソートの末尾3件に当たるもの（= 後ろから3件）
+    low_posts = [p for p in with_eng if _likes_key(p) == 0][-3:]
 
     # 伸びた投稿の特徴
     top_lines = []
@@ -632,24 +885,25 @@ def get_feedback_for_prompt() -> str:
 # 分析キャッシュ
 # ---------------------------------------------------------------------------
 
-def save_analysis_cache(analysis_text: str) -> None:
-    """AI分析結果をファイルに保存する。"""
+def save_analysis_cache(analysis_text: str, source_hash: str = "") -> None:
+    """AI分析結果をファイルに保存する。
+
+    source_hash は分析時の入力データのハッシュ（同じなら再分析を省略できる）。
+    """
     data = {
         "analysis": analysis_text,
         "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "hash": source_hash,
     }
-    _ANALYSIS_CACHE_FILE.write_text(
-        json.dumps(data, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    _atomic_write_bytes(_ANALYSIS_CACHE_FILE, orjson.dumps(data))
 
 
 def load_analysis_cache() -> dict:
     """保存されたAI分析結果を読み込む。"""
     if _ANALYSIS_CACHE_FILE.exists():
         try:
-            return json.loads(_ANALYSIS_CACHE_FILE.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError):
+            return orjson.loads(_ANALYSIS_CACHE_FILE.read_bytes())
+        except (orjson.JSONDecodeError, OSError):
             return {}
     return {}
 
@@ -660,29 +914,30 @@ def load_analysis_cache() -> dict:
 
 def get_dashboard_stats() -> dict:
     """ダッシュボード用: 今日の投稿数と最近の投稿を返す。"""
-    history = _load_history()
+    _, app_posts = _app_posts_by_epoch()
     today = time.strftime("%Y-%m-%d")
 
-    # source=app の投稿だけを対象にする
-    app_posts = [h for h in history if h.get("source") == "app"]
-
-    # 今日の投稿数
+    # source=app の投稿を新しい方から1回だけ走査する。時系列順に並んでいるので、
+    # 今日以外の投稿が出た時点で今日の件数は確定し、最近の投稿（最大10件）も揃えば打ち切る
     today_count = 0
-    for h in app_posts:
-        ts = h.get("timestamp", "")
-        if ts.startswith(today):
-            today_count += 1
-
-    # 最近の投稿（新しい順、最大10件）
-    recent = app_posts[-10:][::-1]
+    counting_today = True
     recent_posts = []
-    for h in recent:
-        recent_posts.append({
-            "text": h.get("text", "")[:80],
-            "timestamp": h.get("timestamp", ""),
-            "platform": h.get("platform", ""),
-            "style": h.get("style", ""),
-        })
+    for h in reversed(app_posts):
+        ts = h.get("timestamp") or ""
+        if counting_today:
+            if ts.startswith(today):
+                today_count += 1
+            else:
+                counting_today = False
+        if len(recent_posts) < 10:
+            recent_posts.append({
+                "text": (h.get("text") or "")[:80],
+                "timestamp": ts,
+                "platform": h.get("platform", ""),
+                "style": h.get("style", ""),
+            })
+        elif not counting_today:
+            break
 
     return {
         "today_count": today_count,
@@ -8,20 +8,35 @@ logic.py — 生成・投稿ロジック（main.py から分離）
 
 from __future__ import annotations
 
+import calendar
+import email.utils
+import hashlib
+import heapq
+import html as html_lib
+import io
 import ipaddress
+import json
 import logging
+import os
 import random
 import re
 import socket
+import threading
 import time
-from functools import wraps
-from typing import TypeVar, Callable
-from urllib.parse import parse_qs, urlparse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache, wraps
+from itertools import accumulate
+from typing import BinaryIO, TypeVar, Callable
+from urllib.parse import parse_qs, quote, urlparse
 
 import feedparser
+import orjson
 import requests
 import tweepy
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from google import genai
 from google.genai import errors as genai_errors
 from google.genai.types import GenerateContentConfig
@@ -31,16 +46,76 @@ _log = logging.getLogger(__name__)
 T = TypeVar("T")
 
 
+def _build_session() -> requests.Session:
+    """接続プール付きの共有 Session を作る。
+
+    RSS / note / Threads への HTTP はすべてこれを通し、TCP+TLS 接続を使い回す。
+    接続確立前のエラーのみ urllib3 側で軽くリトライする（POST の二重送信は起きない）。
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=2, backoff_factor=0.3),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = _build_session()
+
+
+def _json_body(resp: requests.Response):
+    """レスポンス本文を orjson で読む（resp.json() の文字コード判定と標準 json を省く）。
+
+    JSON でなければ ValueError（orjson.JSONDecodeError）を送出する。
+    """
+    return orjson.loads(resp.content)
+
+
+@lru_cache(maxsize=4)
+def _get_genai_client(api_key: str) -> genai.Client:
+    """API キーごとに genai.Client を1つだけ作って使い回す（接続も共有される）。"""
+    return genai.Client(api_key=api_key)
+
+
+_RETRY_MAX_DELAY = 5.0  # 秒（ジッターを除く）
+_RETRY_AFTER_MAX = 60.0  # サーバー指定の待ち時間がこれより長ければリトライしない
+
+
+def _retry_after_seconds(resp: requests.Response | None) -> float | None:
+    """Retry-After（秒 or HTTP 日付）/ x-rate-limit-reset（UNIX 時刻）から待つべき秒数を返す。"""
+    if resp is None:
+        return None
+    headers = getattr(resp, "headers", None) or {}
+    value = headers.get("Retry-After")
+    if value:
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError, IndexError):
+            pass
+    reset = headers.get("x-rate-limit-reset") or headers.get("X-RateLimit-Reset")
+    if reset and reset.strip().isdigit():
+        return max(0.0, int(reset) - time.time())
+    return None
+
+
 def _retry_api_call(
     fn: Callable[..., T],
     *args,
     max_retries: int = 3,
-    base_delay: float = 2.0,
+    base_delay: float = 0.75,
     **kwargs,
 ) -> T:
     """指数バックオフ付きリトライでAPI呼び出しを実行する。
 
     429 (Rate Limit) / 503 (Service Unavailable) / 接続エラー時に自動リトライ。
+    待ち時間は1回あたり最大 _RETRY_MAX_DELAY 秒。例外のレスポンスに Retry-After 等が
+    あればその時間だけ待つ（_RETRY_AFTER_MAX 秒を超える指定ならリトライせず送出する）。
     """
     last_err: Exception | None = None
     for attempt in range(max_retries + 1):
@@ -66,7 +141,12 @@ def _retry_api_call(
                 raise
 
         if attempt < max_retries:
-            delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
+            delay = min(_RETRY_MAX_DELAY, base_delay * (2 ** attempt)) + random.uniform(0, 0.3)
+            retry_after = _retry_after_seconds(getattr(last_err, "response", None))
+            if retry_after is not None:
+                if retry_after > _RETRY_AFTER_MAX:
+                    break
+                delay = max(delay, retry_after)
             _log.info("API リトライ %d/%d (%.1f秒後): %s",
                       attempt + 1, max_retries, delay, last_err)
             time.sleep(delay)
@@ -78,25 +158,48 @@ def _retry_api_call(
 # SSRF 防止 — プライベートIPへのアクセスをブロック
 # ---------------------------------------------------------------------------
 
-def _is_private_url(url: str) -> bool:
-    """URL のホストがプライベート / ループバック / リンクローカルなら True を返す。"""
+_HOST_CHECK_TTL = 300  # 秒。DNS の結果をこの間だけ使い回す
+# urlparse().hostname は IPv6 の角括弧を外すので "::1" も入れておく
+_LOOPBACK_NAMES = frozenset({"localhost", "ip6-localhost", "::1", "[::1]"})
+
+
+@lru_cache(maxsize=256)
+def _host_is_private(hostname: str, _ttl_bucket: int) -> bool:
+    """ホスト名を DNS 解決し、どれかのアドレスがプライベート等なら True を返す。
+
+    _ttl_bucket は時刻を _HOST_CHECK_TTL で割った値。変わるとキャッシュが効かなくなり、
+    引き直しになる（lru_cache に TTL を持たせる代わり）。
+    """
     try:
-        hostname = urlparse(url).hostname or ""
-        # localhost は即ブロック
-        if hostname.lower() in ("localhost", "[::1]"):
-            return True
-        # DNS 解決してIPアドレスを検査
         addr_infos = socket.getaddrinfo(hostname, None)
-        for _, _, _, _, sockaddr in addr_infos:
+    except (socket.gaierror, UnicodeError, OSError):
+        # 解決不能ホストはブロックしない（取得時のエラーに任せる）
+        return False
+    for _, _, _, _, sockaddr in addr_infos:
+        try:
             ip = ipaddress.ip_address(sockaddr[0])
-            if ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved:
-                return True
-    except (socket.gaierror, ValueError, OSError):
-        # 解決不能ホストはブロックしない（feedparser に任せる）
-        pass
+        except ValueError:
+            continue
+        if ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved:
+            return True
     return False
 
 
+def _is_private_url(url: str) -> bool:
+    """URL のホストがプライベート / ループバック / リンクローカルなら True を返す。
+
+    同じホストへの DNS 解決は _HOST_CHECK_TTL 秒の間キャッシュする。
+    """
+    try:
+        hostname = (urlparse(url).hostname or "").lower()
+    except ValueError:
+        return False
+    # localhost は即ブロック
+    if hostname in _LOOPBACK_NAMES:
+        return True
+    return _host_is_private(hostname, int(time.monotonic() // _HOST_CHECK_TTL))
+
+
 # ---------------------------------------------------------------------------
 # RSS URL 正規化・オートディスカバリ
 # ---------------------------------------------------------------------------
@@ -137,7 +240,41 @@ def normalize_rss_url(url: str) -> str:
     return url
 
 
-def discover_rss_from_html(url: str, timeout: int = 10) -> str | None:
+# オートディスカバリの <link> は <head> 内にあるので先頭だけ見れば足りる
+_DISCOVERY_SCAN_BYTES = 64 * 1024
+_LINK_TAG_RE = re.compile(rb"<link\b[^>]*>", re.IGNORECASE)
+_TAG_ATTR_RE = re.compile(
+    rb"""([a-zA-Z_:][-a-zA-Z0-9_:.]*)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))"""
+)
+_FEED_LINK_TYPES = frozenset({b"application/rss+xml", b"application/atom+xml"})
+
+
+def _find_feed_link(html: bytes) -> str | None:
+    """HTML 先頭のバイト列から RSS/Atom の <link rel="alternate"> の href を返す。
+
+    DOM は組み立てず、<link> タグを正規表現で拾って属性を読むだけ。
+    属性の順序やクォートの種類は問わない。
+    """
+    for tag in _LINK_TAG_RE.finditer(html):
+        attrs = {}
+        for m in _TAG_ATTR_RE.finditer(tag.group(0), 5):
+            name = m.group(1).lower()
+            if name not in attrs:
+                value = m.group(2)
+                if value is None:
+                    value = m.group(3) if m.group(3) is not None else m.group(4)
+                attrs[name] = value
+        if b"alternate" not in attrs.get(b"rel", b"").lower().split():
+            continue
+        if attrs.get(b"type", b"").split(b";")[0].strip().lower() not in _FEED_LINK_TYPES:
+            continue
+        href = attrs.get(b"href", b"").strip()
+        if href:
+            return html_lib.unescape(href.decode("utf-8", errors="replace"))
+    return None
+
+
+def discover_rss_from_html(url: str, timeout: float | tuple[float, float] = (3, 7)) -> str | None:
     """HTML ページから RSS フィード URL を自動探索する（オートディスカバリ）。
 
     <link rel="alternate" type="application/rss+xml" href="..."> を探す。
@@ -147,20 +284,17 @@ def discover_rss_from_html(url: str, timeout: int = 10) -> str | None:
         print(f"[WARN] プライベートURL をブロックしました: {url}")
         return None
     try:
-        resp = requests.get(url, timeout=timeout, headers={
+        # stream=True で本文を先頭 _DISCOVERY_SCAN_BYTES だけ読み、残りは受信しない
+        with SESSION.get(url, timeout=timeout, stream=True, headers={
             "User-Agent": "Mozilla/5.0 (AutoPost RSS Discoverer)"
-        })
-        resp.raise_for_status()
+        }) as resp:
+            resp.raise_for_status()
+            head = resp.raw.read(_DISCOVERY_SCAN_BYTES, decode_content=True)
     except Exception:
         return None
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    link = soup.find("link", attrs={
-        "rel": "alternate",
-        "type": re.compile(r"application/(rss|atom)\+xml"),
-    })
-    if link and link.get("href"):
-        href = link["href"]
+    href = _find_feed_link(head)
+    if href:
         # 相対パスの場合は絶対 URL に変換
         if href.startswith("/"):
             parsed = urlparse(url)
@@ -169,10 +303,12 @@ def discover_rss_from_html(url: str, timeout: int = 10) -> str | None:
     return None
 
 
+_FEED_HINT_RE = re.compile(r"rss|feed|atom|\.xml|\.rdf", re.IGNORECASE)
+
+
 def _is_feed_url(url: str) -> bool:
     """URL が RSS/Atom フィードらしいかを簡易判定する。"""
-    lower = url.lower()
-    return any(kw in lower for kw in ("rss", "feed", "atom", ".xml", ".rdf"))
+    return _FEED_HINT_RE.search(url) is not None
 
 
 # ---------------------------------------------------------------------------
@@ -214,7 +350,7 @@ def suggest_keywords_from_persona(
     Returns:
         キーワードのリスト（最大5件）
     """
-    client = genai.Client(api_key=api_key)
+    client = _get_genai_client(api_key)
     prompt = _KEYWORD_SUGGESTION_PROMPT.format(persona_info=persona_info)
 
     try:
@@ -243,6 +379,15 @@ def suggest_keywords_from_persona(
     return keywords[:5]
 
 
+@lru_cache(maxsize=4096)
+def _keyword_to_rss_url(keyword: str) -> str:
+    """1キーワード分の Google News RSS URL を組み立てる（結果はキャッシュ）。"""
+    return (
+        f"https://news.google.com/rss/search?q={quote(keyword)}"
+        "&hl=ja&gl=JP&ceid=JP:ja"
+    )
+
+
 def keywords_to_rss_urls(keywords: list[str]) -> list[str]:
     """キーワードリストを Google News RSS URL に変換する。
 
@@ -252,92 +397,201 @@ def keywords_to_rss_urls(keywords: list[str]) -> list[str]:
     Returns:
         Google News RSS URL のリスト
     """
-    from urllib.parse import quote
-
-    base = "https://news.google.com/rss/search?q={query}&hl=ja&gl=JP&ceid=JP:ja"
-    urls = []
-    for kw in keywords:
-        kw = kw.strip()
-        if not kw:
-            continue
-        url = base.format(query=quote(kw))
-        urls.append(url)
-    return urls
+    to_url = _keyword_to_rss_url
+    return [to_url(kw) for kw in map(str.strip, keywords) if kw]
 
 
 # ---------------------------------------------------------------------------
 # トレンド取得
 # ---------------------------------------------------------------------------
 
-def fetch_trends(rss_urls: list[str], blacklist: list[str]) -> list[dict]:
-    """RSS URL リストからトレンドワードを取得する。
+_FEED_FETCH_WORKERS = 8
+_MAX_TRENDS = 15
+_FEED_HEADERS = {"User-Agent": "Mozilla/5.0 (AutoPost RSS Reader)"}
 
-    - 複数ソースを統合し、重複を除去
-    - ブラックリストに含まれる語を除外
-    - 新しい順にソートし、最大15件を返す
-    - 各トレンドにソースURL・ソース名を付与
-    """
-    # --- 前処理: URL 正規化 & オートディスカバリ ---
-    resolved_urls: list[str] = []
-    for raw_url in rss_urls:
-        normalized = normalize_rss_url(raw_url)
-        if normalized != raw_url or _is_feed_url(normalized):
-            # 変換済み or もともとフィード URL
-            resolved_urls.append(normalized)
+
+def _resolve_feed_url(raw_url: str) -> str:
+    """URL 正規化 & オートディスカバリで、実際に取得するフィード URL を決める。"""
+    normalized = normalize_rss_url(raw_url)
+    if normalized != raw_url or _is_feed_url(normalized):
+        # 変換済み or もともとフィード URL
+        return normalized
+    # フィードらしくない URL → HTML からオートディスカバリ
+    discovered = discover_rss_from_html(normalized)
+    if discovered:
+        print(f"[INFO] RSS自動検出: {normalized} → {discovered}")
+        return discovered
+    # 発見できなかった場合はそのまま渡す（feedparser に任せる）
+    return normalized
+
+
+_FEED_ROOT_TAGS = frozenset({"rss", "feed", "RDF"})
+_FEED_ENTRY_TAGS = frozenset({"item", "entry"})
+_FEED_DATE_TAGS = ("pubDate", "published", "updated", "date")  # 優先順
+
+
+def _local_name(tag: str) -> str:
+    """'{namespace}name' 形式のタグから名前空間を外す。"""
+    return tag.rpartition("}")[2]
+
+
+def _parse_feed_date(tag: str, text: str) -> float | None:
+    """pubDate（RFC 822）または published/updated/dc:date（ISO 8601）を UNIX 時刻にする。"""
+    try:
+        if tag == "pubDate":
+            dt = email.utils.parsedate_to_datetime(text)
         else:
-            # フィードらしくない URL → HTML からオートディスカバリ
-            discovered = discover_rss_from_html(normalized)
-            if discovered:
-                print(f"[INFO] RSS自動検出: {normalized} → {discovered}")
-                resolved_urls.append(discovered)
-            else:
-                # 発見できなかった場合はそのまま渡す（feedparser に任せる）
-                resolved_urls.append(normalized)
+            dt = datetime.fromisoformat(text)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)  # タイムゾーンなしは UTC とみなす（feedparser と同じ）
+    return dt.timestamp()
+
+
+def _parse_feed_fast(xml_bytes: bytes) -> tuple[str | None, list[tuple[str, float | None, str]]]:
+    """RSS 2.0 / RSS 1.0 / Atom を iterparse で読み、(フィード名, [(title, ts, link)]) を返す。
 
-    collected: list[tuple[str, float | None, str, str]] = []  # (title, ts, link, feed_title)
-    for url in resolved_urls:
-        if _is_private_url(url):
-            print(f"[WARN] プライベートURL をブロックしました: {url}")
+    使うのはタイトル・リンク・日時だけなので、feedparser のようなサニタイズや
+    相対 URI の解決はしない。エントリを読み終えるたびに要素を解放する。
+    フィードとして読めなければ ET.ParseError / ValueError を送出する。
+    """
+    feed_title: str | None = None
+    entries: list[tuple[str, float | None, str]] = []
+    depth = 0  # item / entry の入れ子の深さ
+    root_checked = False
+    for event, elem in ET.iterparse(io.BytesIO(xml_bytes), events=("start", "end")):
+        name = _local_name(elem.tag)
+        if event == "start":
+            if not root_checked:
+                if name not in _FEED_ROOT_TAGS:
+                    raise ValueError(f"フィードではありません: <{name}>")
+                root_checked = True
+            if name in _FEED_ENTRY_TAGS:
+                depth += 1
             continue
-        try:
-            feed = feedparser.parse(url)
-            feed_title = feed.feed.get("title", url) if hasattr(feed, "feed") else url
-            for entry in feed.entries:
-                title = entry.get("title", "").strip()
-                if not title:
-                    continue
-                link = entry.get("link", "")
-                pub = entry.get("published_parsed") or entry.get("updated_parsed")
+
+        if name in _FEED_ENTRY_TAGS:
+            depth -= 1
+            title = ""
+            link = ""
+            dates: dict[str, str] = {}
+            for child in elem:
+                cname = _local_name(child.tag)
+                if cname == "title":
+                    title = "".join(child.itertext()).strip()
+                elif cname == "link" and not link:
+                    # Atom は href 属性（rel なし or alternate）、RSS は本文
+                    if child.get("href") is not None:
+                        if child.get("rel", "alternate") == "alternate":
+                            link = child.get("href", "").strip()
+                    else:
+                        link = (child.text or "").strip()
+                elif cname in _FEED_DATE_TAGS and child.text:
+                    dates.setdefault(cname, child.text.strip())
+            if title:
                 ts = None
-                if pub:
-                    try:
-                        ts = time.mktime(pub)
-                    except Exception:
-                        ts = None
-                collected.append((title, ts, link, feed_title))
-        except Exception as e:
-            # 1つのソースが失敗しても他を続行
-            print(f"[WARN] RSS取得失敗 ({url}): {e}")
-
-    # 重複除去（新しい順）
-    collected.sort(key=lambda x: x[1] or 0, reverse=True)
-    seen: set[str] = set()
-    trends: list[dict] = []
-    for title, _, link, feed_title in collected:
-        key = title.lower()
-        if key in seen:
-            continue
-        if any(term in title for term in blacklist):
+                for tag in _FEED_DATE_TAGS:
+                    if tag in dates:
+                        ts = _parse_feed_date(tag, dates[tag])
+                        break
+                entries.append((title, ts, link))
+            elem.clear()
+        elif name == "title" and depth == 0 and feed_title is None:
+            feed_title = "".join(elem.itertext()).strip() or None
+    return feed_title, entries
+
+
+def _parse_feed_with_feedparser(resp: requests.Response) -> tuple[str | None, list[tuple[str, float | None, str]]]:
+    """_parse_feed_fast で読めないフィードを feedparser で読む（戻り値は同じ形）。"""
+    feed = feedparser.parse(
+        resp.content,
+        response_headers={**resp.headers, "content-location": resp.url},
+    )
+    feed_title = feed.feed.get("title") if hasattr(feed, "feed") else None
+    entries: list[tuple[str, float | None, str]] = []
+    for entry in feed.entries:
+        title = entry.get("title", "").strip()
+        if not title:
             continue
-        seen.add(key)
-        trends.append({
-            "title": title,
-            "source_url": link,
-            "source_name": feed_title,
-        })
+        link = entry.get("link", "")
+        pub = entry.get("published_parsed") or entry.get("updated_parsed")
+        ts = None
+        if pub:
+            # feedparser の *_parsed は UTC の struct_time（mktime だとローカル時刻扱いになる）
+            try:
+                ts = float(calendar.timegm(pub))
+            except (TypeError, ValueError, OverflowError):
+                ts = None
+        entries.append((title, ts, link))
+    return feed_title, entries
+
 
-    if len(trends) > 15:
-        trends = trends[:15]
+def _fetch_feed_rows(raw_url: str) -> list[tuple[str, float | None, str, str]]:
+    """1つのソースからエントリを取得し (title, ts, link, feed_title) のリストで返す。
+
+    ブロック対象なら空リスト。取得・解析に失敗した場合も空リストを返す
+    （1つのソースが失敗しても他は続行する）。
+    """
+    url = _resolve_feed_url(raw_url)
+    if _is_private_url(url):
+        print(f"[WARN] プライベートURL をブロックしました: {url}")
+        return []
+    try:
+        # feedparser に URL を渡すと毎回新しい接続を張るので、共有 Session で取得して渡す
+        resp = SESSION.get(url, timeout=(3, 7), headers=_FEED_HEADERS)
+        resp.raise_for_status()
+        try:
+            feed_title, entries = _parse_feed_fast(resp.content)
+        except (ET.ParseError, ValueError):
+            # 壊れた XML や未定義の実体参照などは寛容な feedparser に任せる
+            feed_title, entries = _parse_feed_with_feedparser(resp)
+    except Exception as e:
+        print(f"[WARN] RSS取得失敗 ({url}): {e}")
+        return []
+    feed_title = feed_title or url
+    return [(title, ts, link, feed_title) for title, ts, link in entries]
+
+
+@lru_cache(maxsize=32)
+def _blacklist_re(terms: tuple[str, ...]) -> re.Pattern[str]:
+    """ブラックリスト語のどれかを含むかを1回の走査で判定する正規表現。"""
+    return re.compile("|".join(map(re.escape, terms)))
+
+
+def fetch_trends(rss_urls: list[str], blacklist: list[str]) -> list[dict]:
+    """RSS URL リストからトレンドワードを取得する。
+
+    - 複数ソースを統合し、重複を除去
+    - ブラックリストに含まれる語を除外
+    - 新しい順にソートし、最大 _MAX_TRENDS（15）件を返す
+    - 各トレンドにソースURL・ソース名を付与
+    """
+    # 大文字小文字を無視したタイトル → 最も新しい (title, ts, link, feed_title)
+    best: dict[str, tuple[str, float | None, str, str]] = {}
+    blacklist_re = _blacklist_re(tuple(blacklist)) if blacklist else None
+    if rss_urls:
+        # フィードごとの取得は待ち時間がほとんどなので並列に行う（結果は元の順で結合）
+        with ThreadPoolExecutor(max_workers=min(_FEED_FETCH_WORKERS, len(rss_urls))) as ex:
+            for rows in ex.map(_fetch_feed_rows, rss_urls):
+                for row in rows:
+                    title = row[0]
+                    if blacklist_re and blacklist_re.search(title):
+                        continue
+                    key = title.casefold()
+                    prev = best.get(key)
+                    # 同時刻なら先に来たものを残す（ソースの並び順を優先）
+                    if prev is None or (row[1] or 0) > (prev[1] or 0):
+                        best[key] = row
+
+    # 重複を除いた後で新しい順に上位だけ取り出す
+    newest = heapq.nlargest(
+        _MAX_TRENDS, best.values(), key=lambda x: x[1] or 0,
+    )
+    trends = [
+        {"title": title, "source_url": link, "source_name": feed_title}
+        for title, _, link, feed_title in newest
+    ]
 
     if not trends:
         return []
@@ -374,32 +628,67 @@ _TREND_ANALYSIS_PROMPT = """\
 """
 
 
-def analyze_trends(
-    trends: list[str],
-    persona: str,
-    api_key: str,
-    model: str = "gemini-2.5-flash",
-) -> list[dict]:
-    """トレンドをGeminiで分析し、ペルソナとの相性が良い順にランク付けする。
+# Gemini 応答のメモリキャッシュ: blake2b(model, temperature, prompt) → (保存時刻, 応答テキスト)
+_GEMINI_CACHE_TTL = 3600  # 秒
+_GEMINI_CACHE_MAX = 128
+_gemini_cache: dict[str, tuple[float, str]] = {}
+_gemini_cache_lock = threading.Lock()
+_gemini_inflight: dict[str, threading.Lock] = {}  # キー → 実行中の呼び出しのロック
 
-    Returns:
-        [{"trend": "...", "angle": "...", "score": 8}, ...]
-        最大3件。解析失敗時は空リストを返す。
-    """
-    import json as _json
 
-    if not trends:
-        return []
+def _generate_text_cached(
+    client: genai.Client,
+    model: str,
+    prompt: str,
+    temperature: float,
+    ttl: float = _GEMINI_CACHE_TTL,
+) -> str:
+    """generate_content の応答テキストを返す。同じ入力の応答が ttl 秒以内にあれば再利用する。
 
-    client = genai.Client(api_key=api_key)
-    trends_text = "\n".join(f"- {t}" for t in trends)
-    prompt = _TREND_ANALYSIS_PROMPT.format(persona=persona, trends=trends_text)
+    同じ入力の呼び出しが同時に来た場合は API を1回だけ呼び、結果を共有する。
+    モデルが見つからない場合は gemini-2.5-pro で再試行する。
+    """
+    key = hashlib.blake2b(
+        f"{model}\0{temperature}\0{prompt}".encode("utf-8"), digest_size=16,
+    ).hexdigest()
+    with _gemini_cache_lock:
+        hit = _gemini_cache.get(key)
+        if hit and time.monotonic() - hit[0] < ttl:
+            return hit[1]
+        # 同じ入力の呼び出しが並行して来たら、先頭の1件だけが API を叩き残りは結果を待つ
+        key_lock = _gemini_inflight.setdefault(key, threading.Lock())
 
+    try:
+        with key_lock:
+            with _gemini_cache_lock:
+                hit = _gemini_cache.get(key)
+            if hit and time.monotonic() - hit[0] < ttl:
+                return hit[1]
+            text = _generate_text(client, model, prompt, temperature)
+            if not text:
+                return text  # 空応答（ブロック等）はキャッシュしない
+            with _gemini_cache_lock:
+                _gemini_cache.pop(key, None)
+                if len(_gemini_cache) >= _GEMINI_CACHE_MAX:
+                    # 挿入順 = 古い順なので先頭から捨てる
+                    del _gemini_cache[next(iter(_gemini_cache))]
+                _gemini_cache[key] = (time.monotonic(), text)
+            return text
+    finally:
+        with _gemini_cache_lock:
+            if _gemini_inflight.get(key) is key_lock:
+                del _gemini_inflight[key]
+
+
+def _generate_text(
+    client: genai.Client, model: str, prompt: str, temperature: float,
+) -> str:
+    """generate_content の応答テキストを返す。モデルが見つからなければ gemini-2.5-pro で再試行する。"""
     try:
         response = client.models.generate_content(
             model=model,
             contents=prompt,
-            config=GenerateContentConfig(temperature=0.3),
+            config=GenerateContentConfig(temperature=temperature),
         )
     except genai_errors.ClientError as e:
         msg = str(e)
@@ -407,29 +696,81 @@ def analyze_trends(
             response = client.models.generate_content(
                 model="gemini-2.5-pro",
                 contents=prompt,
-                config=GenerateContentConfig(temperature=0.3),
+                config=GenerateContentConfig(temperature=temperature),
             )
         else:
             raise
+    return response.text
+
+
+_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*\n?(.*?)\n?```", re.DOTALL)
 
-    text = response.text.strip()
 
-    # JSON 抽出（コードブロック対応）
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _parse_json_array(text: str) -> list | None:
+    """LLM の応答から JSON 配列を取り出して返す。取り出せなければ None。
+
+    まず最初の "[" から最後の "]" までを切り出して読む（前後の説明文や
+    コードブロックの囲みはこれで外れる）。読めなければコードブロックの中身、
+    最後に最初の "[" から始まる配列だけを試す。
+    """
+    candidates = []
+    start = text.find("[")
+    end = text.rfind("]")
+    if 0 <= start < end:
+        candidates.append(text[start:end + 1])
     if "```" in text:
-        # ```json ... ``` のパターン
-        import re as _re
-        match = _re.search(r"```(?:json)?\s*\n?(.*?)\n?```", text, _re.DOTALL)
+        match = _JSON_BLOCK_RE.search(text)
         if match:
-            text = match.group(1).strip()
-
-    try:
-        result = _json.loads(text)
+            candidates.append(match.group(1).strip())
+    for snippet in candidates:
+        try:
+            result = orjson.loads(snippet)
+        except orjson.JSONDecodeError:
+            continue
         if isinstance(result, list):
-            # score 降順で最大3件
-            result.sort(key=lambda x: x.get("score", 0), reverse=True)
-            return result[:3]
-    except (_json.JSONDecodeError, TypeError):
-        pass
+            return result
+    if start >= 0:
+        # 配列の後ろに "[" "]" を含む説明文が続く場合: 先頭の配列だけを読む
+        try:
+            result, _ = _JSON_DECODER.raw_decode(text, start)
+        except ValueError:
+            return None
+        if isinstance(result, list):
+            return result
+    return None
+
+
+def analyze_trends(
+    trends: list[str],
+    persona: str,
+    api_key: str,
+    model: str = "gemini-2.5-flash",
+) -> list[dict]:
+    """トレンドをGeminiで分析し、ペルソナとの相性が良い順にランク付けする。
+
+    Returns:
+        [{"trend": "...", "angle": "...", "score": 8}, ...]
+        最大3件。解析失敗時は空リストを返す。
+    """
+    if not trends:
+        return []
+
+    client = _get_genai_client(api_key)
+    trends_text = "\n".join(f"- {t}" for t in trends)
+    prompt = _TREND_ANALYSIS_PROMPT.format(persona=persona, trends=trends_text)
+
+    # 同じトレンド・ペルソナなら結果はほぼ変わらないので、一定時間は応答を使い回す
+    text = _generate_text_cached(client, model, prompt, temperature=0.3).strip()
+
+    result = _parse_json_array(text)
+    if result is not None:
+        # score 降順で最大3件
+        result = [r for r in result if isinstance(r, dict)]
+        result.sort(key=lambda x: x.get("score", 0), reverse=True)
+        return result[:3]
 
     return []
 
@@ -438,6 +779,19 @@ def analyze_trends(
 # スタイル選択
 # ---------------------------------------------------------------------------
 
+_POST_TYPES = ("A", "B", "C")
+
+
+def _cum_weights(items: list[dict]) -> list[float]:
+    """items の weight（既定 1）の累積和を返す。"""
+    return list(accumulate(s.get("weight", 1) for s in items))
+
+
+@lru_cache(maxsize=32)
+def _post_type_cum_weights(a_ratio: float, b_ratio: float, c_ratio: float) -> tuple[float, ...]:
+    return tuple(accumulate((a_ratio, b_ratio, c_ratio)))
+
+
 def select_style(writing_styles: list[dict]) -> dict:
     """投稿スタイルを重み付きランダムで選択する。"""
     if not writing_styles:
@@ -450,9 +804,7 @@ def select_style(writing_styles: list[dict]) -> dict:
             "structure": "自由構成",
             "example": "",
         }
-    weights = [s.get("weight", 1) for s in writing_styles]
-    chosen = random.choices(writing_styles, weights=weights, k=1)[0]
-    return chosen
+    return random.choices(writing_styles, cum_weights=_cum_weights(writing_styles), k=1)[0]
 
 
 def select_post_type(post_type_cfg: dict) -> str:
@@ -464,10 +816,34 @@ def select_post_type(post_type_cfg: dict) -> str:
     a_ratio = post_type_cfg.get("type_a_ratio", 3)
     b_ratio = post_type_cfg.get("type_b_ratio", 1)
     c_ratio = post_type_cfg.get("type_c_ratio", 1)
-    chosen = random.choices(
-        ["A", "B", "C"], weights=[a_ratio, b_ratio, c_ratio], k=1
+    return random.choices(
+        _POST_TYPES, cum_weights=_post_type_cum_weights(a_ratio, b_ratio, c_ratio), k=1
     )[0]
-    return chosen
+
+
+# (writing_styles, post_type_cfg, {"A": (候補, 累積重み), "B": ...})。同じオブジェクトが
+# 渡される間（=設定が保存し直されるまで）は候補リストも累積重みも作り直さない
+_style_index_cache: (
+    tuple[list[dict], dict, dict[str, tuple[list[dict], list[float]]]] | None
+) = None
+
+
+def _styles_by_type(
+    writing_styles: list[dict], post_type_cfg: dict
+) -> dict[str, tuple[list[dict], list[float]]]:
+    """タイプA/B ごとの (候補スタイル一覧, 累積重み) を返す（該当なしなら全スタイル）。"""
+    global _style_index_cache
+    cached = _style_index_cache
+    if cached is not None and cached[0] is writing_styles and cached[1] is post_type_cfg:
+        return cached[2]
+    index: dict[str, tuple[list[dict], list[float]]] = {}
+    for post_type, cfg_key in (("A", "type_a_styles"), ("B", "type_b_styles")):
+        allowed = set(post_type_cfg.get(cfg_key, []))
+        # フォールバック: 全スタイルから選択
+        candidates = [s for s in writing_styles if s["name"] in allowed] or writing_styles
+        index[post_type] = (candidates, _cum_weights(candidates))
+    _style_index_cache = (writing_styles, post_type_cfg, index)
+    return index
 
 
 def select_style_for_type(
@@ -480,16 +856,10 @@ def select_style_for_type(
     タイプA: type_a_styles に含まれるスタイルのみから選択
     タイプB: type_b_styles に含まれるスタイルのみから選択
     """
-    if post_type == "A":
-        allowed = set(post_type_cfg.get("type_a_styles", []))
-    else:
-        allowed = set(post_type_cfg.get("type_b_styles", []))
-
-    candidates = [s for s in writing_styles if s["name"] in allowed]
+    candidates, cum = _styles_by_type(writing_styles, post_type_cfg)["A" if post_type == "A" else "B"]
     if not candidates:
-        # フォールバック: 全スタイルから選択
-        candidates = writing_styles
-    return select_style(candidates)
+        return select_style(candidates)
+    return random.choices(candidates, cum_weights=cum, k=1)[0]
 
 
 # ---------------------------------------------------------------------------
@@ -505,8 +875,7 @@ def select_note_promotion_style(promotion_styles: list[dict]) -> dict:
             "weight": 1,
             "prompt": "記事の内容に軽く触れながら、さりげなく紹介してください。",
         }
-    weights = [s.get("weight", 1) for s in promotion_styles]
-    return random.choices(promotion_styles, weights=weights, k=1)[0]
+    return random.choices(promotion_styles, cum_weights=_cum_weights(promotion_styles), k=1)[0]
 
 
 # ---------------------------------------------------------------------------
@@ -544,11 +913,11 @@ def fetch_note_articles(note_url_or_name: str) -> list[dict]:
     )
 
     try:
-        resp = requests.get(api_url, timeout=15, headers={
+        resp = SESSION.get(api_url, timeout=(3, 12), headers={
             "User-Agent": "AutoPost/1.0",
         })
         resp.raise_for_status()
-        data = resp.json()
+        data = _json_body(resp)
     except Exception:
         return []
 
@@ -568,6 +937,11 @@ def fetch_note_articles(note_url_or_name: str) -> list[dict]:
 
     return articles
 
+_NOTE_URL_RE = re.compile(r"https?://note\.com/\S+")
+# 3つ以上の連続改行（generate_note_promotion / sanitize_post で2つに詰める）
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
 def generate_note_promotion(
     article: dict,
     promotion_style: dict,
@@ -579,7 +953,7 @@ def generate_note_promotion(
 
     記事の内容を踏まえた自然な告知文を生成し、URLを文中に組み込む。
     """
-    client = genai.Client(api_key=api_key)
+    client = _get_genai_client(api_key)
 
     url = article.get("url", "")
     title = article.get("title", "")
@@ -664,9 +1038,9 @@ def generate_note_promotion(
     # AIが幻覚で生成した間違ったnote URLを除去し、正しいURLだけを残す
     if url:
         # note.com のURLパターンを全て除去（正しいURLも含めて一旦除去）
-        post = re.sub(r'https?://note\.com/\S+', '', post)
+        post = _NOTE_URL_RE.sub('', post)
         # 空行の連続を整理
-        post = re.sub(r'\n{3,}', '\n\n', post).strip()
+        post = _BLANK_LINES_RE.sub('\n\n', post).strip()
         # 正しいURLを末尾に追加
         post = f"{post}\n\n{url}"
 
@@ -841,7 +1215,7 @@ def generate_post(
     feedback: str = "",
 ) -> str:
     """選択されたスタイル + トレンド + ペルソナから投稿文を生成する。"""
-    client = genai.Client(api_key=api_key)
+    client = _get_genai_client(api_key)
 
     # トレンドなしの場合は専用テンプレートを使う
     if not trends:
@@ -978,7 +1352,7 @@ def generate_persona(
     other: str = "",
 ) -> str:
     """Gemini API でペルソナ設定文を自動生成する。"""
-    client = genai.Client(api_key=api_key)
+    client = _get_genai_client(api_key)
 
     prompt = _PERSONA_GENERATION_PROMPT.format(
         gender=gender if gender else "未指定",
@@ -1030,16 +1404,23 @@ def generate_persona(
 # テキストクリーンアップ
 # ---------------------------------------------------------------------------
 
+# sanitize_post で外すマークダウン記法（上から順に適用する）
+_MARKDOWN_SUBS = (
+    (re.compile(r"\*\*(.+?)\*\*"), r"\1"),
+    (re.compile(r"__(.+?)__"), r"\1"),
+    (re.compile(r"(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)"), r"\1"),
+    (re.compile(r"(?<!_)_(?!_)(.+?)(?<!_)_(?!_)"), r"\1"),
+    (re.compile(r"^#{1,6}\s*", re.MULTILINE), ""),
+    (re.compile(r"^>\s?", re.MULTILINE), ""),
+    (re.compile(r"^[\-\*\+]\s+", re.MULTILINE), "・"),
+)
+
+
 def sanitize_post(text: str) -> str:
     """投稿テキストの改行・記号を整理し、X で意図通りに表示されるようにする。"""
     # マークダウン記法の置換
-    text = re.sub(r"\*\*(.+?)\*\*", r"\1", text)
-    text = re.sub(r"__(.+?)__", r"\1", text)
-    text = re.sub(r"(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)", r"\1", text)
-    text = re.sub(r"(?<!_)_(?!_)(.+?)(?<!_)_(?!_)", r"\1", text)
-    text = re.sub(r"^#{1,6}\s*", "", text, flags=re.MULTILINE)
-    text = re.sub(r"^>\s?", "", text, flags=re.MULTILINE)
-    text = re.sub(r"^[\-\*\+]\s+", "・", text, flags=re.MULTILINE)
+    for pattern, repl in _MARKDOWN_SUBS:
+        text = pattern.sub(repl, text)
 
     # 各行末尾空白除去
     lines = text.split("\n")
@@ -1047,7 +1428,7 @@ def sanitize_post(text: str) -> str:
     text = "\n".join(lines)
 
     # 3つ以上の連続改行を統一
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _BLANK_LINES_RE.sub("\n\n", text)
 
     return text.strip()
 
@@ -1056,38 +1437,111 @@ def sanitize_post(text: str) -> str:
 # X / Threads 投稿
 # ---------------------------------------------------------------------------
 
+_X_CREDENTIAL_KEYS = ("x_api_key", "x_api_secret", "x_access_token", "x_access_token_secret")
+
+
+def _x_credentials(api_keys: dict) -> tuple[str, str, str, str]:
+    """api_keys から X の認証情報4つを _get_x_clients の引数順で取り出す。"""
+    return (
+        api_keys["x_api_key"],
+        api_keys["x_api_secret"],
+        api_keys["x_access_token"],
+        api_keys["x_access_token_secret"],
+    )
+
+
+@lru_cache(maxsize=8)
+def _get_x_clients(
+    consumer_key: str,
+    consumer_secret: str,
+    access_token: str,
+    access_token_secret: str,
+) -> tuple[tweepy.Client, tweepy.API]:
+    """認証情報ごとに tweepy.Client（v2）と tweepy.API（v1.1, 画像用）を作って使い回す。
+
+    どちらも内部に requests.Session を持つので、使い回せば接続も共有される。
+    """
+    client = tweepy.Client(
+        consumer_key=consumer_key,
+        consumer_secret=consumer_secret,
+        access_token=access_token,
+        access_token_secret=access_token_secret,
+    )
+    auth = tweepy.OAuth1UserHandler(
+        consumer_key=consumer_key,
+        consumer_secret=consumer_secret,
+        access_token=access_token,
+        access_token_secret=access_token_secret,
+    )
+    return client, tweepy.API(auth)
+
+
 def post_to_x(
     text: str,
     api_keys: dict,
     image_path: str | None = None,
     alt_text: str | None = None,
+    image_file: BinaryIO | None = None,
 ) -> str:
     """tweepy (API v2) を使って X に投稿する。投稿IDを返す。
 
     image_path が指定された場合:
       - API v1.1 (tweepy.API) で画像をアップロード
       - API v2 (tweepy.Client) で media_ids を付けてツイート
+    image_file（ファイルオブジェクト）を渡した場合はディスクを介さずそこから読み込む。
+    このとき image_path は MIME 判定用のファイル名としてのみ使われる。
     """
-    client = tweepy.Client(
-        consumer_key=api_keys["x_api_key"],
-        consumer_secret=api_keys["x_api_secret"],
-        access_token=api_keys["x_access_token"],
-        access_token_secret=api_keys["x_access_token_secret"],
-    )
+    try:
+        return _post_to_x(text, api_keys, image_path, alt_text, image_file)
+    except tweepy.Unauthorized:
+        # キーが失効・再発行された可能性があるので、次回は作り直す
+        _get_x_clients.cache_clear()
+        raise
+
+
+# X の画像サイズ上限。静止画は chunked アップロードでも 5MB まで、GIF だけ 15MB まで送れる
+_X_SIMPLE_UPLOAD_MAX = 5 * 1024 * 1024  # 単発 (simple) アップロードの上限バイト数
+_X_GIF_UPLOAD_MAX = 15 * 1024 * 1024
+
+
+def _post_to_x(
+    text: str,
+    api_keys: dict,
+    image_path: str | None,
+    alt_text: str | None,
+    image_file: BinaryIO | None,
+) -> str:
+    client, api_v1 = _get_x_clients(*_x_credentials(api_keys))
 
     media_ids = None
-    if image_path:
+    if image_path or image_file is not None:
         # v1.1 API でメディアアップロード
-        auth = tweepy.OAuth1UserHandler(
-            consumer_key=api_keys["x_api_key"],
-            consumer_secret=api_keys["x_api_secret"],
-            access_token=api_keys["x_access_token"],
-            access_token_secret=api_keys["x_access_token_secret"],
-        )
-        api_v1 = tweepy.API(auth)
-        media = api_v1.media_upload(filename=image_path)
-
-        # ALTテキストがあれば設定
+        filename = image_path or "image.png"
+        if image_file is not None:
+            size = image_file.seek(0, os.SEEK_END)
+            image_file.seek(0)  # リトライ時も先頭から読み直す
+        else:
+            size = os.path.getsize(filename)
+        upload_file = image_file
+        upload_kwargs = {}
+        if size > _X_SIMPLE_UPLOAD_MAX:
+            # 5MB を超えて送れるのは GIF の chunked アップロードだけ。静止画はアップロード前に止める
+            is_gif = filename.lower().endswith(".gif")
+            limit = _X_GIF_UPLOAD_MAX if is_gif else _X_SIMPLE_UPLOAD_MAX
+            if size > limit:
+                raise RuntimeError(
+                    f"X に投稿できる画像サイズを超えています "
+                    f"({size / 1024 / 1024:.1f}MB / 上限 {limit // 1024 // 1024}MB)"
+                )
+            upload_kwargs = {"chunked": True, "media_category": "tweet_gif"}
+            if image_file is not None:
+                # tweepy の chunked_upload は渡されたファイルを閉じるので、リトライで
+                # 読み直せるよう元のバッファ（呼び出し側の持ち物）ではなく複製を渡す
+                upload_file = io.BytesIO(image_file.read())
+        media = api_v1.media_upload(filename=filename, file=upload_file, **upload_kwargs)
+
+        # ALTテキストがあれば設定（空白だけなら送らない）
+        alt_text = (alt_text or "").strip()
         if alt_text:
             api_v1.create_media_metadata(
                 media_id=media.media_id, alt_text=alt_text
@@ -1099,6 +1553,127 @@ def post_to_x(
     return str(response.data["id"])
 
 
+def _geometric_delays(first: float, ratio: float, cap: float, budget: float) -> tuple[float, ...]:
+    """first 秒から ratio 倍ずつ伸びる（1回 cap 秒まで）待ち時間の列を、合計 budget 秒ぶん返す。"""
+    delays: list[float] = []
+    total = 0.0
+    delay = first
+    while total + delay < budget:
+        delays.append(delay)
+        total += delay
+        delay = min(delay * ratio, cap)
+    if budget - total > 0:
+        delays.append(budget - total)  # 最後は残り時間ちょうど
+    return tuple(delays)
+
+
+# Threads コンテナの状態確認の間隔。テキストはたいてい1秒以内に終わるので細かく、
+# 画像は処理に数秒かかるので最初を長めにとる。どちらも後半ほど間隔を広げる
+_THREADS_POLL_BUDGET = 30.0  # 秒
+_THREADS_POLL_BACKOFF_MAX = 16.0  # 状態確認が失敗し続けたときの最大間隔（秒）
+_THREADS_POLL_DELAYS: dict[str, tuple[float, ...]] = {
+    "TEXT": _geometric_delays(0.5, 1.6, 6.0, _THREADS_POLL_BUDGET),
+    "IMAGE": _geometric_delays(1.5, 1.6, 6.0, _THREADS_POLL_BUDGET),
+}
+
+
+# 公開に失敗したコンテナ: blake2b(トークン, 種別, 画像URL, 本文) → (作成時刻, creation_id)
+# リトライ時に作成と処理待ちをやり直さずに公開だけを再試行するため
+_THREADS_CONTAINER_TTL = 1800  # 秒（コンテナ自体は24時間有効）
+_threads_containers: dict[str, tuple[float, str]] = {}
+_threads_container_lock = threading.Lock()
+
+
+def _reusable_threads_container(cache_key: str, headers: dict) -> str | None:
+    """同じ投稿で作った未公開のコンテナが FINISHED のまま残っていればその ID を返す。"""
+    now = time.monotonic()
+    with _threads_container_lock:
+        for key in [k for k, (ts, _) in _threads_containers.items() if now - ts >= _THREADS_CONTAINER_TTL]:
+            del _threads_containers[key]
+        hit = _threads_containers.get(cache_key)
+    if hit is None:
+        return None
+    creation_id = hit[1]
+    try:
+        resp = SESSION.get(
+            f"https://graph.threads.net/v1.0/{creation_id}",
+            params={"fields": "status"},
+            headers=headers,
+            timeout=10,
+        )
+        if resp.status_code == 200 and _json_body(resp).get("status") == "FINISHED":
+            return creation_id
+    except (requests.RequestException, ValueError):
+        pass
+    with _threads_container_lock:
+        _threads_containers.pop(cache_key, None)
+    return None
+
+
+def _create_threads_container(base: str, params: dict[str, str], headers: dict) -> str:
+    """コンテナを作成し、処理完了を待ってから creation_id を返す。"""
+    create_resp = SESSION.post(
+        f"{base}/threads",
+        params=params,
+        headers=headers,
+        timeout=30,
+    )
+    if create_resp.status_code != 200:
+        detail = create_resp.text
+        raise RuntimeError(
+            f"Threads コンテナ作成失敗 (HTTP {create_resp.status_code}): {detail}"
+        )
+
+    creation_id = _json_body(create_resp).get("id")
+    if not creation_id:
+        raise RuntimeError(f"Threads コンテナIDが取得できません: {create_resp.text}")
+
+    # Step 1.5: コンテナの処理完了を待つ（最大30秒）
+    # 状態確認がエラーを返す間は間隔を倍々に広げる（Retry-After があればそれに従う）
+    deadline = time.monotonic() + _THREADS_POLL_BUDGET
+    consecutive_errors = 0
+    finished = False
+    status_resp: requests.Response | None = None
+    for delay in _THREADS_POLL_DELAYS[params["media_type"]]:
+        if consecutive_errors:
+            backoff = _retry_after_seconds(status_resp)
+            if backoff is None:
+                backoff = min(1.0 * 2 ** consecutive_errors, _THREADS_POLL_BACKOFF_MAX)
+            delay = max(delay, backoff)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(delay, remaining))
+        try:
+            status_resp = SESSION.get(
+                f"https://graph.threads.net/v1.0/{creation_id}",
+                params={"fields": "status"},
+                headers=headers,
+                timeout=10,
+            )
+        except requests.RequestException:
+            status_resp = None
+            consecutive_errors += 1
+            continue
+        if status_resp.status_code != 200:
+            consecutive_errors += 1
+            continue
+        consecutive_errors = 0
+        status_data = _json_body(status_resp)
+        status = status_data.get("status", "")
+        if status == "FINISHED":
+            finished = True
+            break
+        if status == "ERROR":
+            err_msg = status_data.get("error_message", "不明なエラー")
+            raise RuntimeError(f"Threads コンテナ処理失敗: {err_msg}")
+        # IN_PROGRESS や PUBLISHED 以外の場合は待機続行
+    if not finished:
+        logging.getLogger(__name__).warning("Threads コンテナステータス確認タイムアウト。公開を試みます。")
+
+    return creation_id
+
+
 def post_to_threads(text: str, api_key: str, image_url: str = "") -> str:
     """Threads Graph API を使って投稿する。投稿IDを返す。
 
@@ -1108,6 +1683,7 @@ def post_to_threads(text: str, api_key: str, image_url: str = "") -> str:
 
     api_key は Threads User Access Token として扱う。
     image_url が指定された場合、画像付き投稿になる。
+    公開に失敗した後の同じ内容での再試行では、作成済みのコンテナをそのまま公開し直す。
     """
     base = "https://graph.threads.net/v1.0/me"
 
@@ -1116,7 +1692,7 @@ def post_to_threads(text: str, api_key: str, image_url: str = "") -> str:
 
     headers = {"Authorization": f"Bearer {api_key}"}
 
-    # Step 1: コンテナ作成
+    # Step 1: コンテナ作成（直前の失敗で作ったものが公開待ちなら再利用する）
     params: dict[str, str] = {"text": text}
     if image_url:
         params["media_type"] = "IMAGE"
@@ -1124,45 +1700,15 @@ def post_to_threads(text: str, api_key: str, image_url: str = "") -> str:
     else:
         params["media_type"] = "TEXT"
 
-    create_resp = requests.post(
-        f"{base}/threads",
-        params=params,
-        headers=headers,
-        timeout=30,
-    )
-    if create_resp.status_code != 200:
-        detail = create_resp.text
-        raise RuntimeError(
-            f"Threads コンテナ作成失敗 (HTTP {create_resp.status_code}): {detail}"
-        )
-
-    creation_id = create_resp.json().get("id")
-    if not creation_id:
-        raise RuntimeError(f"Threads コンテナIDが取得できません: {create_resp.text}")
-
-    # Step 1.5: コンテナの処理完了を待つ（最大30秒）
-    import time as _time
-    for attempt in range(15):
-        _time.sleep(2)
-        status_resp = requests.get(
-            f"https://graph.threads.net/v1.0/{creation_id}",
-            params={"fields": "status"},
-            headers=headers,
-            timeout=10,
-        )
-        if status_resp.status_code == 200:
-            status = status_resp.json().get("status", "")
-            if status == "FINISHED":
-                break
-            if status == "ERROR":
-                err_msg = status_resp.json().get("error_message", "不明なエラー")
-                raise RuntimeError(f"Threads コンテナ処理失敗: {err_msg}")
-        # IN_PROGRESS や PUBLISHED 以外の場合は待機続行
-    else:
-        logging.getLogger(__name__).warning("Threads コンテナステータス確認タイムアウト。公開を試みます。")
+    cache_key = _token_digest(f"{api_key}\0{params['media_type']}\0{image_url}\0{text}")
+    creation_id = _reusable_threads_container(cache_key, headers)
+    if creation_id is None:
+        creation_id = _create_threads_container(base, params, headers)
+        with _threads_container_lock:
+            _threads_containers[cache_key] = (time.monotonic(), creation_id)
 
     # Step 2: 公開
-    publish_resp = requests.post(
+    publish_resp = SESSION.post(
         f"{base}/threads_publish",
         params={"creation_id": creation_id},
         headers=headers,
@@ -1174,17 +1720,49 @@ def post_to_threads(text: str, api_key: str, image_url: str = "") -> str:
             f"Threads 公開失敗 (HTTP {publish_resp.status_code}): {detail}"
         )
 
-    post_id = publish_resp.json().get("id", "unknown")
+    with _threads_container_lock:
+        _threads_containers.pop(cache_key, None)
+    post_id = _json_body(publish_resp).get("id", "unknown")
     return str(post_id)
 
 
+# 更新で受け取ったトークン: blake2b(トークン) → (受け取った時刻, 失効時刻)
+# Threads は発行から24時間未満の長期トークンを更新できないので、その間に
+# もう一度更新を頼まれたら API を呼ばずに手元のトークンをそのまま返す
+_THREADS_REFRESH_MIN_AGE = 24 * 3600  # 秒
+_THREADS_EXPIRY_BUFFER = 300  # 失効直前の扱いにする余裕（秒）
+_threads_issued: dict[str, tuple[float, float]] = {}
+_threads_token_lock = threading.Lock()
+
+
+def _token_digest(token: str) -> str:
+    """キャッシュのキー用。トークンそのものは辞書のキーに残さない。"""
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).hexdigest()
+
+
 def refresh_threads_token(current_token: str) -> dict:
     """短期トークンを長期トークン（60日）に交換する。
 
+    この処理で受け取ったばかり（24時間未満）のトークンを渡された場合は
+    API を呼ばず、そのトークンと残りの有効秒数に "cached": True を付けて返す。
+
     Returns:
         {"access_token": "...", "expires_in": 5184000} 形式の dict。
     """
-    resp = requests.get(
+    key = _token_digest(current_token)
+    now = time.time()
+    with _threads_token_lock:
+        issued = _threads_issued.get(key)
+    if issued:
+        received_at, expires_at = issued
+        if now - received_at < _THREADS_REFRESH_MIN_AGE and now < expires_at - _THREADS_EXPIRY_BUFFER:
+            return {
+                "access_token": current_token,
+                "expires_in": int(expires_at - now),
+                "cached": True,
+            }
+
+    resp = SESSION.get(
         "https://graph.threads.net/refresh_access_token",
         params={
             "grant_type": "th_refresh_token",
@@ -1198,16 +1776,23 @@ def refresh_threads_token(current_token: str) -> dict:
         if current_token and current_token in detail:
             detail = detail.replace(current_token, "***")
         raise RuntimeError(f"トークン更新失敗 (HTTP {resp.status_code}): {detail}")
-    data = resp.json()
+    data = _json_body(resp)
     if "access_token" not in data:
         raise RuntimeError("トークン更新レスポンス不正: access_token が含まれていません")
+    try:
+        expires_in = float(data.get("expires_in", 0))
+    except (TypeError, ValueError):
+        expires_in = 0.0
+    if expires_in > 0:
+        with _threads_token_lock:
+            _threads_issued[_token_digest(data["access_token"])] = (now, now + expires_in)
     return data
 
 
 def check_threads_token_expiry(api_key: str) -> int | None:
     """Threads トークンの残り日数を返す。取得失敗時は None。"""
     try:
-        resp = requests.get(
+        resp = SESSION.get(
             "https://graph.threads.net/v1.0/me",
             params={"fields": "id", "access_token": api_key},
             timeout=10,
@@ -1229,7 +1814,7 @@ def test_gemini_connection(api_key: str, model: str = "gemini-2.5-flash") -> tup
     if not api_key:
         return False, "API Key が未設定です"
     try:
-        client = genai.Client(api_key=api_key)
+        client = _get_genai_client(api_key)
         response = client.models.generate_content(
             model=model,
             contents="テスト。「OK」とだけ返してください。",
@@ -1242,18 +1827,16 @@ def test_gemini_connection(api_key: str, model: str = "gemini-2.5-flash") -> tup
 
 def test_x_connection(api_keys: dict) -> tuple[bool, str]:
     """X (Twitter) API の接続テスト。認証情報を検証する。"""
-    required = ["x_api_key", "x_api_secret", "x_access_token", "x_access_token_secret"]
-    for key in required:
+    for key in _X_CREDENTIAL_KEYS:
         if not api_keys.get(key):
             return False, f"{key} が未設定です"
     try:
-        client = tweepy.Client(
-            consumer_key=api_keys["x_api_key"],
-            consumer_secret=api_keys["x_api_secret"],
-            access_token=api_keys["x_access_token"],
-            access_token_secret=api_keys["x_access_token_secret"],
-        )
-        me = client.get_me()
+        client, _ = _get_x_clients(*_x_credentials(api_keys))
+        try:
+            me = client.get_me()
+        except tweepy.Unauthorized:
+            _get_x_clients.cache_clear()
+            raise
         if me and me.data:
             return True, f"✅ 接続成功（@{me.data.username}）"
         return False, "❌ ユーザー情報を取得できませんでした"
@@ -1266,14 +1849,14 @@ def test_threads_connection(api_key: str) -> tuple[bool, str]:
     if not api_key:
         return False, "API Key が未設定です"
     try:
-        resp = requests.get(
+        resp = SESSION.get(
             "https://graph.threads.net/v1.0/me",
             params={"fields": "id,username"},
             headers={"Authorization": f"Bearer {api_key}"},
             timeout=10,
         )
         if resp.status_code == 200:
-            data = resp.json()
+            data = _json_body(resp)
             username = data.get("username", "?")
             return True, f"✅ 接続成功（@{username}）"
         return False, f"❌ HTTP {resp.status_code}: {resp.text[:200]}"
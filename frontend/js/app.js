@@ -193,6 +193,19 @@ App.api = async function (url, options = {}) {
     return res.json();
 };
 
+// 投稿ジョブ（/api/post）の完了を待って結果を返す
+App.waitForPostJob = async function (jobId) {
+    for (;;) {
+        await new Promise(function (resolve) { setTimeout(resolve, 1000); });
+        const job = await App.api("/api/post/" + encodeURIComponent(jobId));
+        if (job.status === "pending") continue;
+        if (job.status !== "done") {
+            throw new Error(job.error || "投稿ジョブが失敗しました");
+        }
+        return job;
+    }
+};
+
 // ==========================================================================
 // ダッシュボード
 // ==========================================================================
@@ -582,6 +595,10 @@ App.generator.post = async function (index) {
                 }),
             });
         }
+        // 送信はサーバー側でバックグラウンド実行されるため、完了までポーリングする
+        if (result.job_id) {
+            result = await App.waitForPostJob(result.job_id);
+        }
 
         const msgs = [];
         let hasSuccess = false;